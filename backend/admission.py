@@ -0,0 +1,324 @@
+import math
+import time
+import uuid
+import sqlite3
+import itertools
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from collections import namedtuple, defaultdict
+from flask import current_app, request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+# ==============================
+# ⚙️ LANES & LIMITS
+# ==============================
+
+# priority: lower is served first when a slot frees up
+# share: fraction of the global slots the lane may hold at once
+# burst / per_minute: per-user token bucket
+Lane = namedtuple('Lane', ['priority', 'share', 'burst', 'per_minute'])
+
+LANES = {
+    # Uploads outrank chat, and chat can never hold more than half the slots
+    "upload": Lane(priority=0, share=1.0, burst=10, per_minute=10),
+    "chat": Lane(priority=1, share=0.5, burst=20, per_minute=30)
+}
+
+DEFAULTS = {
+    "ADMISSION_MAX_CONCURRENT": 8,      # LLM-backed requests running at once
+    "ADMISSION_MAX_WAITING": 16,        # requests allowed to queue for a slot
+    "ADMISSION_WAIT_TIMEOUT": 2.0,      # seconds a queued request waits before 429
+    "ADMISSION_SQLITE_PATH": None       # set to share limits across worker processes
+}
+
+# Slots held by a crashed worker are reclaimed after this long (shared backend)
+SLOT_TTL_SECONDS = 300
+
+# Cap on remembered buckets per process before idle (full) ones are dropped
+MAX_BUCKETS = 10000
+
+
+def lane_limit(lane, max_concurrent):
+    return max(1, int(max_concurrent * lane.share))
+
+
+# ==============================
+# 🧠 IN-PROCESS BACKEND
+# ==============================
+
+class MemoryBackend:
+    """Token buckets and a priority-ordered slot pool for one worker process."""
+
+    def __init__(self, max_concurrent, max_waiting):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.cond = threading.Condition()
+        self.buckets = {}
+        self.active = 0
+        self.lane_active = defaultdict(int)
+        self.waiters = []
+        self.seq = itertools.count()
+
+    def take_token(self, key, burst, per_second):
+        # Returns 0 if allowed, otherwise seconds until a token is available
+        with self.cond:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            if len(self.buckets) > MAX_BUCKETS:
+                # Anything idle long enough to have refilled is the same as no entry
+                self.buckets = {k: v for k, v in self.buckets.items() if now - v[1] < burst / per_second}
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return 0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / per_second
+
+    def refund_token(self, key, burst):
+        # Give back a token taken for a request that never got a slot
+        with self.cond:
+            if key in self.buckets:
+                tokens, updated = self.buckets[key]
+                self.buckets[key] = (min(burst, tokens + 1), updated)
+
+    def _next_runnable(self):
+        # First waiter, in (priority, arrival) order, whose lane still has room
+        for waiter in sorted(self.waiters):
+            if self.lane_active[waiter[2]] < waiter[3]:
+                return waiter
+        return None
+
+    def _can_run(self, lane, limit, ticket):
+        if self.active >= self.max_concurrent or self.lane_active[lane] >= limit:
+            return False
+        head = self._next_runnable()
+        return head is None or head == ticket
+
+    def acquire(self, lane, priority, limit, timeout):
+        with self.cond:
+            if self._can_run(lane, limit, None):
+                return self._admit(lane)
+            if len(self.waiters) >= self.max_waiting:
+                return None
+
+            ticket = (priority, next(self.seq), lane, limit)
+            self.waiters.append(ticket)
+            deadline = time.monotonic() + timeout
+            try:
+                while not self._can_run(lane, limit, ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.cond.wait(remaining)
+                return self._admit(lane)
+            finally:
+                self.waiters.remove(ticket)
+                self.cond.notify_all()
+
+    def _admit(self, lane):
+        self.active += 1
+        self.lane_active[lane] += 1
+        return lane
+
+    def release(self, slot):
+        with self.cond:
+            self.active -= 1
+            self.lane_active[slot] -= 1
+            self.cond.notify_all()
+
+
+# ==============================
+# 🗄️ SHARED SQLITE BACKEND
+# ==============================
+
+class SqliteBackend:
+    """Same limits as MemoryBackend, held in a SQLite file shared by all workers.
+
+    Every decision runs inside BEGIN IMMEDIATE, so only one process updates
+    the buckets/slots at a time. Queued requests poll for a slot.
+    """
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, path, max_concurrent, max_waiting):
+        self.path = path
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.local = threading.local()
+        with self._tx() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS admission_buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS admission_slots (id TEXT PRIMARY KEY, lane TEXT, expires REAL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS admission_waiters "
+                "(id TEXT PRIMARY KEY, priority INTEGER, enqueued REAL, lane TEXT, lane_limit INTEGER, expires REAL)"
+            )
+
+    def _conn(self):
+        if not hasattr(self.local, 'conn'):
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return self.local.conn
+
+    @contextmanager
+    def _tx(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def take_token(self, key, burst, per_second):
+        with self._tx() as conn:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM admission_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0, now - updated) * per_second)
+            allowed = tokens >= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO admission_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens - 1 if allowed else tokens, now)
+            )
+            return 0 if allowed else (1 - tokens) / per_second
+
+    def refund_token(self, key, burst):
+        with self._tx() as conn:
+            conn.execute("UPDATE admission_buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?", (burst, key))
+
+    def _try_admit(self, conn, lane, limit, waiter_id, now):
+        conn.execute("DELETE FROM admission_slots WHERE expires < ?", (now,))
+        conn.execute("DELETE FROM admission_waiters WHERE expires < ?", (now,))
+
+        lane_counts = dict(conn.execute("SELECT lane, COUNT(*) FROM admission_slots GROUP BY lane").fetchall())
+        if sum(lane_counts.values()) >= self.max_concurrent or lane_counts.get(lane, 0) >= limit:
+            return None
+
+        # Same head-of-line rule as MemoryBackend._next_runnable
+        for wid, wlane, wlimit in conn.execute(
+            "SELECT id, lane, lane_limit FROM admission_waiters ORDER BY priority, enqueued"
+        ):
+            if lane_counts.get(wlane, 0) < wlimit:
+                if wid != waiter_id:
+                    return None
+                break
+
+        slot = str(uuid.uuid4())
+        conn.execute("INSERT INTO admission_slots (id, lane, expires) VALUES (?, ?, ?)", (slot, lane, now + SLOT_TTL_SECONDS))
+        return slot
+
+    def acquire(self, lane, priority, limit, timeout):
+        waiter_id = str(uuid.uuid4())
+        enqueued = time.time()
+        deadline = enqueued + timeout
+
+        with self._tx() as conn:
+            slot = self._try_admit(conn, lane, limit, None, enqueued)
+            if slot:
+                return slot
+            if conn.execute("SELECT COUNT(*) FROM admission_waiters").fetchone()[0] >= self.max_waiting:
+                return None
+            conn.execute(
+                "INSERT INTO admission_waiters (id, priority, enqueued, lane, lane_limit, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                (waiter_id, priority, enqueued, lane, limit, deadline)
+            )
+
+        while True:
+            time.sleep(self.POLL_SECONDS)
+            with self._tx() as conn:
+                now = time.time()
+                slot = self._try_admit(conn, lane, limit, waiter_id, now) if now < deadline else None
+                if slot or now >= deadline:
+                    conn.execute("DELETE FROM admission_waiters WHERE id = ?", (waiter_id,))
+                    return slot
+
+    def release(self, slot):
+        with self._tx() as conn:
+            conn.execute("DELETE FROM admission_slots WHERE id = ?", (slot,))
+
+
+# ==============================
+# 🚦 ROUTE DECORATOR
+# ==============================
+
+def get_backend():
+    app = current_app._get_current_object()
+    backend = app.extensions.get('admission')
+    if backend is None:
+        config = {key: app.config.get(key, default) for key, default in DEFAULTS.items()}
+        args = (config["ADMISSION_MAX_CONCURRENT"], config["ADMISSION_MAX_WAITING"])
+        if config["ADMISSION_SQLITE_PATH"]:
+            backend = SqliteBackend(config["ADMISSION_SQLITE_PATH"], *args)
+        else:
+            backend = MemoryBackend(*args)
+        backend = app.extensions.setdefault('admission', backend)
+    return backend
+
+
+def _client_id():
+    # Logged-in user if there is a token, otherwise the caller's address
+    verify_jwt_in_request(optional=True)
+    return get_jwt_identity() or request.remote_addr
+
+
+def too_many_requests(message, retry_after):
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+@contextmanager
+def admission(lane_name):
+    """Per-user token bucket plus a global slot pool around an LLM call.
+
+    Yields None once admitted (the slot is released on exit), or the 429
+    response to return instead:
+
+        with admission('upload') as rejected:
+            if rejected is not None:
+                return rejected
+            ...
+    """
+    lane = LANES[lane_name]
+    backend = get_backend()
+
+    key = f"{lane_name}:{_client_id()}"
+    wait = backend.take_token(key, lane.burst, lane.per_minute / 60)
+    if wait:
+        yield too_many_requests("Too many requests. Please slow down.", math.ceil(wait))
+        return
+
+    timeout = current_app.config.get("ADMISSION_WAIT_TIMEOUT", DEFAULTS["ADMISSION_WAIT_TIMEOUT"])
+    slot = backend.acquire(lane_name, lane.priority, lane_limit(lane, backend.max_concurrent), timeout)
+    if slot is None:
+        # Turned away for server load, not for this user's rate
+        backend.refund_token(key, lane.burst)
+        yield too_many_requests("Server is busy. Please try again shortly.", max(1, math.ceil(timeout)))
+        return
+
+    try:
+        yield None
+    finally:
+        backend.release(slot)
+
+
+def admission_control(lane_name):
+    """Route decorator form of admission() for routes that are one LLM call."""
+    if lane_name not in LANES:
+        raise ValueError(f"Unknown admission lane: {lane_name}")
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with admission(lane_name) as rejected:
+                if rejected is not None:
+                    return rejected
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
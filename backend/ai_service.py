@@ -3,10 +3,12 @@ import cv2
 import json
 import base64
 import random
+import mimetypes
 from datetime import datetime
 from dotenv import load_dotenv
 from google import genai
 from groq import Groq
+from ocr_service import local_extract, fields_to_escalate, merge_extractions, record_extraction
 
 load_dotenv()
 
@@ -116,6 +118,207 @@ Return valid JSON only:
         }
 
 
+# ==============================
+# 📦 GEMINI BATCH OCR (Several Documents, One Request)
+# ==============================
+
+# Inline request payloads are capped at ~20MB; base64 inflates files by 4/3
+MAX_BATCH_BYTES = 12 * 1024 * 1024
+MAX_BATCH_DOCS = 8
+
+EXTRACTION_FIELDS = {
+    "patient_name": str,
+    "policy_number": str,
+    "claim_amount": (int, float),
+    "has_signature": bool,
+    "has_stamp": bool,
+    "text_clarity": str,
+    "admission_date": str,
+    "claim_date": str,
+    "extraction_confidence": (int, float)
+}
+
+
+class BatchSizer:
+    """Adaptive documents-per-request limit.
+
+    Halves after a batch where most items came back unusable (usually a
+    truncated response) and creeps back up after clean batches.
+    """
+
+    def __init__(self, max_docs=MAX_BATCH_DOCS, max_bytes=MAX_BATCH_BYTES):
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.limit = max_docs
+
+    def plan(self, image_paths):
+        # Greedily pack paths into batches under both the doc and byte limits
+        batches, current, size = [], [], 0
+        for path in image_paths:
+            cost = os.path.getsize(path) * 4 // 3
+            if current and (len(current) >= self.limit or size + cost > self.max_bytes):
+                batches.append(current)
+                current, size = [], 0
+            current.append(path)
+            size += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def observe(self, batch_size, failed):
+        if batch_size > 1 and failed * 2 > batch_size:
+            self.limit = max(1, self.limit // 2)
+        elif failed == 0:
+            self.limit = min(self.max_docs, self.limit + 1)
+
+
+batch_sizer = BatchSizer()
+
+
+def validate_extraction(item):
+    # Coerce one demultiplexed result to the gemini_ocr schema, or None if unusable.
+    # Every field must be present; JSON null counts as the field's empty value
+    if not isinstance(item, dict) or not all(field in item for field in EXTRACTION_FIELDS):
+        return None
+    result = {}
+    for field, kind in EXTRACTION_FIELDS.items():
+        value = item[field]
+        if value is None:
+            value = 0 if kind == (int, float) else ("" if kind is str else False)
+        if kind == (int, float) and isinstance(value, bool):
+            return None
+        if kind == (int, float) and isinstance(value, str):
+            try:
+                value = float(value.replace(",", "") or 0)
+            except ValueError:
+                return None
+        if not isinstance(value, kind):
+            return None
+        result[field] = value
+    return result
+
+
+def gemini_ocr_batch(image_paths, insurance_type, observe=True):
+    """Extract several documents in one Gemini request.
+
+    Results come back tagged with their input index. An item that comes
+    back but fails validation is retried on its own with gemini_ocr; items
+    missing from the response (usually truncation) are re-sent in batches
+    half the size. Transport errors from the API are raised to the caller.
+    Returns one result per path, in order.
+
+    Only first attempts (observe=True) adjust batch_sizer; the smaller retry
+    batches usually come back clean and would undo the shrink at once.
+    """
+    if len(image_paths) == 1:
+        return [gemini_ocr(image_paths[0], insurance_type)]
+
+    parts = [{
+        "text": f"""
+You are a strict OCR extraction engine.
+
+You are given {len(image_paths)} {insurance_type} insurance documents, each introduced by
+"Document <index>:". Extract each one independently.
+
+DO NOT guess.
+If a field is not visible, return empty string.
+
+Return a valid JSON array only, one object per document:
+
+[
+  {{
+    "index": 0,
+    "patient_name": "",
+    "policy_number": "",
+    "claim_amount": 0,
+    "has_signature": false,
+    "has_stamp": false,
+    "text_clarity": "",
+    "admission_date": "",
+    "claim_date": "",
+    "extraction_confidence": 0
+  }}
+]
+"""
+    }]
+    for index, path in enumerate(image_paths):
+        with open(path, "rb") as f:
+            image_bytes = f.read()
+        parts.append({"text": f"Document {index}:"})
+        parts.append({
+            "inline_data": {
+                "mime_type": mimetypes.guess_type(path)[0] or "image/png",
+                "data": base64.b64encode(image_bytes).decode("utf-8")
+            }
+        })
+
+    response = gemini_client.models.generate_content(
+        model="gemini-2.5-flash",
+        contents=[{"role": "user", "parts": parts}]
+    )
+    raw = (response.text or "").strip()
+    try:
+        items = json.loads(raw[raw.find("["):raw.rfind("]") + 1])
+    except ValueError:
+        print("\n⚠️ Gemini returned invalid batch JSON:")
+        print(raw)
+        items = []
+
+    # Demultiplex by index; duplicates and out-of-range indexes are dropped
+    results = [None] * len(image_paths)
+    returned = set()
+    for item in items if isinstance(items, list) else []:
+        index = item.get("index") if isinstance(item, dict) else None
+        if type(index) is int and 0 <= index < len(results) and index not in returned:
+            returned.add(index)
+            results[index] = validate_extraction(item)
+
+    invalid = [i for i in sorted(returned) if results[i] is None]
+    missing = [i for i in range(len(results)) if i not in returned]
+    if observe:
+        batch_sizer.observe(len(image_paths), len(invalid) + len(missing))
+
+    for index in invalid:
+        results[index] = gemini_ocr(image_paths[index], insurance_type)
+
+    step = len(image_paths) // 2
+    for start in range(0, len(missing), step):
+        chunk = missing[start:start + step]
+        retried = gemini_ocr_batch([image_paths[i] for i in chunk], insurance_type, observe=False)
+        for index, result in zip(chunk, retried):
+            results[index] = result
+
+    return results
+
+
+def gemini_ocr_many(image_paths, insurance_type):
+    # Split into adaptively sized batches and flatten the results back in order
+    results = []
+    for batch in batch_sizer.plan(image_paths):
+        results.extend(gemini_ocr_batch(batch, insurance_type))
+    return results
+
+
+# ==============================
+# 🪜 TIERED EXTRACTION (Local first, Gemini fallback)
+# ==============================
+
+def tiered_ocr(image_path, insurance_type, local=None):
+    # `local` lets callers run the Tesseract pass elsewhere (e.g. a process pool)
+    if local is None:
+        local = local_extract(image_path)
+
+    low_fields = fields_to_escalate(local)
+    record_extraction(escalated=bool(low_fields))
+
+    if not low_fields:
+        local["ocr_tier"] = "local"
+        local["escalated_fields"] = []
+        return local
+
+    return merge_extractions(local, gemini_ocr(image_path, insurance_type), low_fields)
+
+
 # ==============================
 # 📅 DATE VALIDATION
 # ==============================
@@ -151,7 +354,8 @@ def get_ml_prediction(features):
 
     rejection_prob = 0.1
 
-    if not features.get("has_signature"):
+    # None: the signature was not checked (document handled by the local OCR tier)
+    if features.get("has_signature") is not None and not features["has_signature"]:
         rejection_prob += 0.35
 
     if features.get("is_blurry"):
@@ -204,15 +408,23 @@ def apply_hitl_logic(rejection_prob):
 
 def analyze_document(file_path, insurance_type):
 
-    results = {}
-
     # 1️⃣ Blur Detection
     blur_result = detect_blur(file_path)
-    results["blur_analysis"] = blur_result
 
-    # 2️⃣ Gemini OCR Extraction
-    extracted = gemini_ocr(file_path, insurance_type)
-    results["extracted_data"] = extracted
+    # 2️⃣ OCR Extraction (Tesseract, escalating to Gemini when unsure)
+    extracted = tiered_ocr(file_path, insurance_type)
+
+    return score_document(blur_result, extracted)
+
+
+def score_document(blur_result, extracted):
+    # Steps 3-5 of the pipeline, split out so the batch processor can run
+    # blur detection and OCR on separate pools and score here afterwards
+
+    results = {
+        "blur_analysis": blur_result,
+        "extracted_data": extracted
+    }
 
     # 3️⃣ Date Validation
     date_issues = validate_dates(extracted)
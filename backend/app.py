@@ -5,6 +5,8 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from groq import Groq
 from models.database import db
+from admission import admission_control
+import responses
 
 # 1. Load Environment Variables
 load_dotenv()
@@ -14,12 +16,7 @@ client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 app = Flask(__name__)
 
-HEAD
-
-# 3. Flask Configuration
-
 # 3. Flask & Database Configuration
-origin/main
 app.config['JWT_SECRET_KEY'] = 'claimassist-hackathon-secret-2024'
 # Ensure upload folder points to the correct root 'uploads' directory
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
@@ -30,12 +27,23 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'claimassist.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Comma-separated emails allowed to use the reviewer queue and admin analytics
+# (in addition to users with is_reviewer set)
+app.config['REVIEWER_EMAILS'] = {e.strip().lower() for e in os.getenv('REVIEWER_EMAILS', '').split(',') if e.strip()}
+
+# --- ADMISSION CONTROL (LLM-backed routes) ---
+# Limits are per worker process unless a shared SQLite file is configured
+app.config['ADMISSION_MAX_CONCURRENT'] = int(os.getenv('ADMISSION_MAX_CONCURRENT', 8))
+app.config['ADMISSION_SQLITE_PATH'] = os.getenv('ADMISSION_SQLITE_PATH')
+
 # 4. Initialize Database and Middleware
 db.init_app(app) 
+# Fast JSON encoding + gzip/brotli compression for API responses
+responses.init_app(app)
 # Allow all origins for local development. 
 # For production, you would restrict this to your frontend's domain.
 # The "null" origin is for when you open index.html directly as a file.
-CORS(app, origins=["http://localhost:5173", "null"])
+CORS(app, origins=["http://localhost:5173", "null"], expose_headers=["X-Claim-Stats"])
 jwt = JWTManager(app)
 
 # Ensure the upload directory exists before the server starts
@@ -44,6 +52,7 @@ if not os.path.exists(app.config['UPLOAD_FOLDER']):
 
 # 5. Chatbot Route
 @app.route('/api/chat', methods=['POST'])
+@admission_control('chat')
 def chat():
     try:
         data = request.json
@@ -68,10 +77,16 @@ def chat():
 from routes.auth import auth_bp
 from routes.claims import claims_bp
 from routes.insurance import insurance_bp
+from routes.review import review_bp
+from rollups import rollups_cli
 
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(claims_bp, url_prefix='/api/claims')
 app.register_blueprint(insurance_bp, url_prefix='/api/insurance')
+app.register_blueprint(review_bp, url_prefix='/api/review')
+
+# Rollup maintenance: `flask --app app rollups rebuild|verify`
+app.cli.add_command(rollups_cli)
 print(app.url_map)
 
 # 7. Start Server & Create Tables
@@ -0,0 +1,405 @@
+"""
+Bulk claim document processor.
+
+Streams a directory or archive (.zip / .tar / .tar.gz) of scanned claim
+documents through the AI pipeline and writes the results as JSONL, or
+straight into Claim/Document rows.
+
+    python batch_process.py partner_dump.zip --type health --out results.jsonl
+    python batch_process.py scans/ --type vehicle --db --user-id 1
+
+Progress is checkpointed after every document, so re-running the same
+command after a crash skips everything that already finished. Documents
+are identified by the source's absolute path plus their name inside it,
+so a checkpoint never confuses two partners' files with the same name.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from ai_service import detect_blur, score_document, gemini_ocr_batch, batch_sizer, MAX_BATCH_DOCS
+from ocr_service import local_extract, fields_to_escalate, merge_extractions, record_extraction, escalation_stats
+
+SUPPORTED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'webp'}
+
+
+def is_supported(name):
+    return '.' in name and name.rsplit('.', 1)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+# ==============================
+# 📂 DOCUMENT SOURCES
+# ==============================
+
+class DirectorySource:
+    def __init__(self, path):
+        self.path = path
+
+    def keys(self):
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            for name in sorted(files):
+                if is_supported(name):
+                    yield os.path.relpath(os.path.join(root, name), self.path)
+
+    def materialize(self, key, workdir):
+        # Files on disk are used in place; nothing to clean up
+        return os.path.join(self.path, key), False
+
+    def close(self):
+        pass
+
+
+class ZipSource:
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path)
+
+    def keys(self):
+        for info in self.archive.infolist():
+            if not info.is_dir() and is_supported(info.filename):
+                yield info.filename
+
+    def materialize(self, key, workdir):
+        target = os.path.join(workdir, f"{uuid.uuid4().hex}_{os.path.basename(key)}")
+        with self.archive.open(key) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return target, True
+
+    def close(self):
+        self.archive.close()
+
+
+class TarSource:
+    def __init__(self, path):
+        self.archive = tarfile.open(path)
+
+    def keys(self):
+        for member in self.archive.getmembers():
+            if member.isfile() and is_supported(member.name):
+                yield member.name
+
+    def materialize(self, key, workdir):
+        target = os.path.join(workdir, f"{uuid.uuid4().hex}_{os.path.basename(key)}")
+        with self.archive.extractfile(key) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return target, True
+
+    def close(self):
+        self.archive.close()
+
+
+def document_id(source_path, key):
+    # e.g. /data/partner_a/scans/bill.png or /data/partner_b.zip/bill.png
+    return os.path.join(os.path.realpath(source_path), key)
+
+
+def open_source(path):
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    if tarfile.is_tarfile(path):
+        return TarSource(path)
+    raise ValueError(f"Unsupported source (expected a directory, .zip or .tar): {path}")
+
+
+# ==============================
+# 💾 CHECKPOINT
+# ==============================
+
+class Checkpoint:
+    """Append-only list of finished document keys, fsynced after each entry.
+
+    Results are written before the key is recorded, so a crash can at worst
+    re-process the single document that was in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def mark(self, key):
+        self.file.write(key + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.done.add(key)
+
+    def close(self):
+        self.file.close()
+
+
+# ==============================
+# 📝 RESULT WRITERS
+# ==============================
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, key, result):
+        self.file.write(json.dumps({"source": key, **result}) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class DatabaseWriter:
+    # One Claim per document, owned by the onboarding user and left 'pending'
+    # so low-confidence documents flow into the reviewer queue
+
+    # Attempts per document when a generated claim_number collides
+    CLAIM_NUMBER_ATTEMPTS = 5
+
+    def __init__(self, user_id, insurance_type, app=None):
+        if app is None:
+            from app import app
+        from models.database import db, Claim, Document
+        from routes.claims import generate_claim_number
+        import review_queue  # registers the needs_review hook, so these claims reach the queue
+        from sqlalchemy.exc import IntegrityError
+        self.db, self.Claim, self.Document = db, Claim, Document
+        self.generate_claim_number = generate_claim_number
+        self.IntegrityError = IntegrityError
+        self.user_id = user_id
+        self.insurance_type = insurance_type
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def build_claim(self, key, result):
+        # Same fields initiate_claim + upload_doc fill in for an interactive claim
+        hitl = result.get("hitl", {})
+        try:
+            claim_amount = float(str(result.get("extracted_data", {}).get("claim_amount") or 0).replace(",", ""))
+        except (TypeError, ValueError):
+            claim_amount = 0.0
+
+        claim = self.Claim(
+            user_id=self.user_id,
+            claim_number=self.generate_claim_number(),
+            insurance_type=self.insurance_type,
+            status='pending',
+            health_score=result.get("health_score", 0),
+            claim_amount=claim_amount,
+            ai_reasons=json.dumps(result.get("ai_reasons", [])),
+            rejection_probability=result.get("rejection_probability", 0),
+            hitl_action=hitl.get("action", 'pending')
+        )
+        claim.documents.append(self.Document(
+            filename=os.path.basename(key)[:100],
+            is_verified=not result.get("blur_analysis", {}).get("is_blurry", False),
+            yolo_data=json.dumps(result.get("yolo_detections", {}))
+        ))
+        return claim
+
+    def write(self, key, result):
+        if "error" in result:
+            return
+
+        for attempt in range(self.CLAIM_NUMBER_ATTEMPTS):
+            try:
+                self.db.session.add(self.build_claim(key, result))
+                self.db.session.commit()
+                return
+            except self.IntegrityError:
+                # Most likely a claim_number collision; try a fresh number
+                self.db.session.rollback()
+                if attempt == self.CLAIM_NUMBER_ATTEMPTS - 1:
+                    raise
+            except Exception:
+                # Leave the session usable for the rest of the run
+                self.db.session.rollback()
+                raise
+
+    def close(self):
+        self.ctx.pop()
+
+
+# ==============================
+# 📈 PROGRESS
+# ==============================
+
+class Progress:
+    def __init__(self, total, skipped):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, failed=False):
+        self.done += 1
+        self.failed += failed
+        self.report()
+
+    def report(self, end='\r'):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.done / elapsed
+        remaining = self.total - self.skipped - self.done
+        eta = time.strftime('%H:%M:%S', time.gmtime(remaining / rate)) if rate else '--:--:--'
+        sys.stderr.write(
+            f"{self.skipped + self.done}/{self.total} docs "
+            f"| {rate:.2f} docs/s | ETA {eta} | failed {self.failed}   {end}"
+        )
+        sys.stderr.flush()
+
+
+# ==============================
+# 🚀 PIPELINE
+# ==============================
+
+class EscalationBatcher:
+    """Groups Gemini escalations from concurrently processed documents.
+
+    Documents wait up to `linger` seconds for company; a batch is sent as
+    soon as it reaches the current adaptive size (see ai_service.BatchSizer).
+    """
+
+    def __init__(self, insurance_type, llm_slots, linger=0.25):
+        self.insurance_type = insurance_type
+        self.llm_slots = llm_slots
+        self.linger = linger
+        self.pending = []
+        self.timer = None
+        self.tasks = set()
+
+    async def submit(self, path):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((path, future))
+        if len(self.pending) >= batch_sizer.limit:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.linger, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        items, self.pending = dict(self.pending), []
+        for batch in batch_sizer.plan(list(items)):
+            task = asyncio.create_task(self.send([(path, items[path]) for path in batch]))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def send(self, items):
+        try:
+            async with self.llm_slots:
+                results = await asyncio.to_thread(gemini_ocr_batch, [p for p, _ in items], self.insurance_type)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+
+async def process_one(path, pool, batcher):
+    loop = asyncio.get_running_loop()
+
+    # CPU stages on the process pool, Gemini escalation batched on a bounded set of threads
+    blur_result, local = await asyncio.gather(
+        loop.run_in_executor(pool, detect_blur, path),
+        loop.run_in_executor(pool, local_extract, path)
+    )
+
+    low_fields = fields_to_escalate(local)
+    record_extraction(escalated=bool(low_fields))
+    if low_fields:
+        extracted = merge_extractions(local, await batcher.submit(path), low_fields)
+    else:
+        extracted = dict(local, ocr_tier="local", escalated_fields=[])
+
+    return score_document(blur_result, extracted)
+
+
+async def run(args):
+    source = open_source(args.source)
+    checkpoint = Checkpoint(args.checkpoint)
+    writer = DatabaseWriter(args.user_id, args.type) if args.db else JsonlWriter(args.out)
+
+    keys = list(source.keys())
+    pending = [k for k in keys if document_id(args.source, k) not in checkpoint.done]
+    progress = Progress(len(keys), len(keys) - len(pending))
+
+    batcher = EscalationBatcher(args.type, asyncio.Semaphore(args.llm_concurrency))
+    # Cap in-flight documents so a huge archive is never extracted to disk all at once,
+    # while leaving room to fill a Gemini batch for every concurrent request
+    window = asyncio.Semaphore(args.llm_concurrency * MAX_BATCH_DOCS + args.workers * 2)
+    workdir = tempfile.mkdtemp(prefix='claimassist_batch_')
+
+    async def handle(key):
+        path, cleanup = None, False
+        doc = document_id(args.source, key)
+        try:
+            path, cleanup = source.materialize(key, workdir)
+            result = await process_one(path, pool, batcher)
+            writer.write(doc, result)
+            checkpoint.mark(doc)
+            progress.update()
+        except Exception as e:
+            # Not checkpointed: the document is retried on the next run
+            writer.write(doc, {"error": str(e)})
+            progress.update(failed=True)
+        finally:
+            if cleanup:
+                os.remove(path)
+            window.release()
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            tasks = []
+            for key in pending:
+                await window.acquire()
+                tasks.append(asyncio.create_task(handle(key)))
+            await asyncio.gather(*tasks)
+    finally:
+        progress.report(end='\n')
+        ocr = escalation_stats()
+        sys.stderr.write(
+            f"OCR: {ocr['handled_locally']} local, {ocr['escalated']} escalated to Gemini "
+            f"({ocr['escalation_rate']:.1%})\n"
+        )
+        writer.close()
+        checkpoint.close()
+        source.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return progress
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-process a backlog of claim documents.")
+    parser.add_argument('source', help="Directory, .zip or .tar(.gz) of documents")
+    parser.add_argument('--type', default='health', help="Insurance type of the documents")
+    parser.add_argument('--out', default='batch_results.jsonl', help="JSONL output file")
+    parser.add_argument('--db', action='store_true', help="Write Claim/Document rows instead of JSONL")
+    parser.add_argument('--user-id', type=int, help="Owner of the created claims (required with --db)")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <out>.checkpoint)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Processes for blur detection")
+    parser.add_argument('--llm-concurrency', type=int, default=8, help="Concurrent (batched) Gemini requests")
+    args = parser.parse_args(argv)
+
+    if args.db and args.user_id is None:
+        parser.error("--user-id is required with --db")
+    if not args.checkpoint:
+        args.checkpoint = (f"claimassist_db_{args.user_id}" if args.db else args.out) + '.checkpoint'
+    return args
+
+
+if __name__ == '__main__':
+    progress = asyncio.run(run(parse_args()))
+    sys.exit(1 if progress.failed else 0)
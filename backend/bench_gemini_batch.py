@@ -0,0 +1,69 @@
+import sys
+import time
+import ai_service
+from ai_service import gemini_ocr, gemini_ocr_many
+
+# Compares one-request-per-document extraction against batched requests.
+# Needs GEMINI_API_KEY; pass document paths or it uses the bundled samples:
+#   python bench_gemini_batch.py sample.png test.png testfile.png
+
+DEFAULT_FILES = ["sample.png", "test.png", "testfile.png"]
+
+
+class UsageRecorder:
+    # Wraps generate_content to count requests and tokens reported by Gemini
+    def __init__(self, models):
+        self.models = models
+        self.original = models.generate_content
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def __call__(self, **kwargs):
+        response = self.original(**kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        self.requests += 1
+        self.prompt_tokens += getattr(usage, "prompt_token_count", 0) or 0
+        self.output_tokens += getattr(usage, "candidates_token_count", 0) or 0
+        return response
+
+
+def run(label, fn, recorder, n_docs):
+    recorder.reset()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n--- {label} ---")
+    print(f"Requests:          {recorder.requests}")
+    print(f"Total time:        {elapsed:.2f}s")
+    print(f"Per document:      {elapsed / n_docs * 1000:.0f} ms")
+    print(f"Prompt tokens/doc: {recorder.prompt_tokens / n_docs:.0f}")
+    print(f"Output tokens/doc: {recorder.output_tokens / n_docs:.0f}")
+    return elapsed, recorder.prompt_tokens + recorder.output_tokens
+
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or DEFAULT_FILES
+    recorder = UsageRecorder(ai_service.gemini_client.models)
+    ai_service.gemini_client.models.generate_content = recorder
+
+    print(f"🚀 Benchmarking {len(files)} documents")
+    single_time, single_tokens = run(
+        "One request per document",
+        lambda: [gemini_ocr(path, "health") for path in files],
+        recorder, len(files)
+    )
+    batch_time, batch_tokens = run(
+        "Batched",
+        lambda: gemini_ocr_many(files, "health"),
+        recorder, len(files)
+    )
+
+    print("\n--- SAVINGS ---")
+    print(f"Latency: {(1 - batch_time / single_time) * 100:.1f}%")
+    if single_tokens:
+        print(f"Tokens:  {(1 - batch_tokens / single_tokens) * 100:.1f}%")
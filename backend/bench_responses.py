@@ -0,0 +1,90 @@
+import sys
+import json
+import time
+import uuid
+import gzip
+from datetime import datetime
+from responses import orjson, brotli, sparse, parse_fields, GZIP_LEVEL, BROTLI_QUALITY
+
+# Payload size and serialization time for the claims list and upload analysis.
+# Offline: uses synthetic data shaped like get_claims / analyze_document output.
+#   python bench_responses.py [number_of_claims]
+
+
+def make_claims(n):
+    return [{
+        "id": i,
+        "claim_number": f"CLM{datetime.now().strftime('%Y%m%d')}{1000 + i % 9000}",
+        "claim_uuid": str(uuid.uuid4()),
+        "insurance_type": ("health", "vehicle", "life")[i % 3],
+        "status": ("draft", "pending", "approved", "rejected")[i % 4],
+        "health_score": round(50 + i % 50 + 0.5, 1),
+        "claim_amount": round(1000 + i * 13.37, 2),
+        "created_at": datetime.now().isoformat(),
+        "ai_reasons": ["Signature missing", "Blurry scan"][: i % 3],
+        "document_count": i % 8
+    } for i in range(n)]
+
+
+def make_analysis():
+    return {
+        "blur_analysis": {"is_blurry": False, "variance": 312.4, "quality": "good", "score": 62},
+        "extracted_data": {
+            "patient_name": "Ravi Kumar", "policy_number": "HLT-2024/88123", "claim_amount": 45250.0,
+            "has_signature": True, "has_stamp": True, "text_clarity": "good",
+            "admission_date": "2024-03-05", "claim_date": "2024-03-12", "extraction_confidence": 0.94,
+            "field_confidence": {"patient_name": 0.95, "policy_number": 0.9, "claim_amount": 0.95, "claim_date": 0.95},
+            "ocr_tier": "local", "escalated_fields": []
+        },
+        "date_issues": [],
+        "rejection_probability": 0.08,
+        "health_score": 92.0,
+        "hitl": {"action": "auto_approve", "status": "approved", "requires_human": False},
+        "processed_at": datetime.now().isoformat()
+    }
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1000
+
+
+def report(label, payload):
+    body, stdlib_ms = timed(lambda: json.dumps(payload, separators=(",", ":"), sort_keys=True).encode())
+    print(f"\n--- {label} ---")
+    print(f"JSON size:          {len(body):>10,} bytes")
+    print(f"stdlib json:        {stdlib_ms:>10.2f} ms")
+    if orjson is not None:
+        _, fast_ms = timed(lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+        print(f"orjson:             {fast_ms:>10.2f} ms  ({stdlib_ms / fast_ms:.1f}x faster)")
+    else:
+        print("orjson:             not installed")
+
+    gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL))
+    print(f"gzip:               {len(gz):>10,} bytes  ({len(gz) / len(body):.0%}, {gz_ms:.2f} ms)")
+    if brotli is not None:
+        br, br_ms = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+        print(f"brotli:             {len(br):>10,} bytes  ({len(br) / len(body):.0%}, {br_ms:.2f} ms)")
+    else:
+        print("brotli:             not installed")
+    return len(body)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    claims = make_claims(n)
+    analysis = make_analysis()
+
+    full = report(f"Claims list ({n:,} claims)", {"claims": claims})
+    fields = "claim_uuid,status,claim_amount"
+    slim = report(f"Claims list ?fields={fields}", {"claims": sparse(claims, parse_fields(fields))})
+    print(f"\nSparse fieldset keeps {slim / full:.0%} of the uncompressed payload")
+
+    full = report("Upload analysis", analysis)
+    fields = "health_score,hitl.action,extracted_data.claim_amount"
+    slim = report(f"Upload analysis ?fields={fields}", sparse(analysis, parse_fields(fields)))
+    print(f"\nSparse fieldset keeps {slim / full:.0%} of the uncompressed payload")
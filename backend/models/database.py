@@ -10,18 +10,32 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
+    is_reviewer = db.Column(db.Boolean, default=False) # may work the HITL review queue / see cross-user analytics
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Claim(db.Model):
     __tablename__ = 'claims'
     id = db.Column(db.Integer, primary_key=True)
     claim_uuid = db.Column(db.String(36), unique=True, default=lambda: str(uuid.uuid4()))
+    claim_number = db.Column(db.String(20), unique=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     insurance_type = db.Column(db.String(20))
     status = db.Column(db.String(20), default='draft') # draft, pending, approved, rejected
     health_score = db.Column(db.Float, default=0.0)
+    claim_amount = db.Column(db.Float, default=0.0)
+    ai_reasons = db.Column(db.Text, default='[]') # JSON list
+    rejection_probability = db.Column(db.Float, default=0.0)
+    hitl_action = db.Column(db.String(30), default='pending') # auto_approve, needs_confirmation, manual_review, reviewed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Reviewer Queue: set by review_queue.py whenever status/hitl_action change
+    needs_review = db.Column(db.Boolean, default=False, nullable=False)
+
+    # Reviewer Lease: who is currently working this claim and until when (see review_queue.py)
+    review_owner = db.Column(db.String(64))
+    review_token = db.Column(db.String(36))
+    review_lease_expires_at = db.Column(db.DateTime)
     
     # Autonomous Tracking: One Claim -> Multiple Documents
     documents = db.relationship('Document', backref='claim', lazy=True, cascade="all, delete-orphan")
@@ -29,8 +43,46 @@ class Claim(db.Model):
 class Document(db.Model):
     __tablename__ = 'documents'
     id = db.Column(db.Integer, primary_key=True)
-    claim_id = db.Column(db.Integer, db.ForeignKey('claims.id'), nullable=False)
+    claim_id = db.Column(db.Integer, db.ForeignKey('claims.id'), nullable=False, index=True)
     filename = db.Column(db.String(100))
     doc_type = db.Column(db.String(50)) # e.g., 'Hospital Bill'
     is_verified = db.Column(db.Boolean, default=False)
-    yolo_data = db.Column(db.Text) # Store JSON string of detections (seals/signatures)
\ No newline at end of file
+    yolo_data = db.Column(db.Text) # Store JSON string of detections (seals/signatures)
+
+class ClaimRollup(db.Model):
+    # Pre-aggregated claim counts/amounts, kept in step with Claim by rollups.py
+    __tablename__ = 'claim_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    insurance_type = db.Column(db.String(20), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    claim_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'insurance_type', 'status', 'day', name='uq_claim_rollups_key'),
+    )
+
+class ClaimGlobalRollup(db.Model):
+    # Same totals summed over every user, so the admin analytics stay a small read
+    __tablename__ = 'claim_global_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    insurance_type = db.Column(db.String(20), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    claim_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('insurance_type', 'status', 'day', name='uq_claim_global_rollups_key'),
+    )
+
+# Reviewer Queue Index: one equality key, then exactly the ORDER BY of
+# review_queue.lease_next, so leasing walks the index instead of sorting
+db.Index(
+    'ix_claims_review_queue',
+    Claim.needs_review,
+    Claim.rejection_probability.desc(),
+    Claim.created_at
+)
@@ -0,0 +1,260 @@
+import re
+import time
+import threading
+from datetime import datetime
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:  # Local tier is optional; without it every document goes to Gemini
+    pytesseract = None
+
+try:
+    from pdf2image import convert_from_path
+except ImportError:
+    convert_from_path = None
+
+
+# ==============================
+# ⚙️ TIER SETTINGS
+# ==============================
+
+# Fields below this confidence are re-extracted by Gemini
+CONFIDENCE_THRESHOLD = 0.75
+
+# Text fields the local tier must read confidently to skip Gemini
+ESCALATION_FIELDS = ("patient_name", "policy_number", "claim_amount", "claim_date")
+
+# Visual fields always taken from Gemini once a document is escalated.
+# Tesseract cannot see a signature or stamp, so documents handled locally
+# report them as None (not checked) and the risk score leaves them out
+VISUAL_FIELDS = ("has_signature", "has_stamp", "text_clarity")
+
+
+# ==============================
+# 🔎 FIELD PATTERNS
+# ==============================
+
+DATE = r"(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4}|\d{1,2}\s+[A-Za-z]{3,9}\.?,?\s+\d{4})"
+CURRENCY = r"(?:rs\.?|inr|₹)"
+
+# (field, pattern, weight): labelled matches are trusted fully, bare ones less
+FIELD_PATTERNS = [
+    ("policy_number", r"(?:policy|pol\.)\s*(?:no\.?|number|#)?\s*[:\-]?\s*([A-Z0-9][A-Z0-9/\-]{5,})", 1.0),
+    ("patient_name", r"(?:patient(?:'s)?\s*name|name\s+of\s+(?:the\s+)?patient|insured\s*name|patient)\s*[:\-]\s*([A-Za-z][A-Za-z .]{2,60})", 1.0),
+    ("claim_amount", r"(?:grand\s+total|net\s+amount|total\s+amount|amount\s+payable|claim\s+amount|net\s+payable|total)\s*(?:\(?" + CURRENCY + r"\)?)?\s*[:\-]?\s*" + CURRENCY + r"?\s*([0-9][0-9,]*(?:\.\d{1,2})?)", 1.0),
+    ("claim_amount", CURRENCY + r"\s*([0-9][0-9,]*(?:\.\d{1,2})?)", 0.5),
+    ("admission_date", r"(?:date\s+of\s+admission|admission\s+date|admitted\s+on|d\.?o\.?a\.?)\s*[:\-]?\s*" + DATE, 1.0),
+    ("claim_date", r"(?:claim\s+date|bill\s+date|invoice\s+date|date\s+of\s+discharge|discharge\s+date)\s*[:\-]?\s*" + DATE, 1.0),
+    ("claim_date", r"\bdate\s*[:\-]\s*" + DATE, 0.6),
+]
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d %b %Y", "%d %B %Y")
+
+
+def normalize_date(value):
+    # Indian documents are day-first; validate_dates expects YYYY-MM-DD
+    value = re.sub(r"[,.]", " ", value) if re.search(r"[A-Za-z]", value) else re.sub(r"[\-.]", "/", value)
+    value = " ".join(value.split())
+    if re.match(r"^\d{4}/", value):
+        value = value.replace("/", "-")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_value(field, raw):
+    raw = raw.strip(" .:-")
+    if field == "claim_amount":
+        try:
+            return float(raw.replace(",", ""))
+        except ValueError:
+            return None
+    if field in ("admission_date", "claim_date"):
+        return normalize_date(raw)
+    if field == "policy_number":
+        return raw.upper() if re.search(r"\d", raw) else None
+    return raw.title() if raw else None
+
+
+# ==============================
+# 📷 TESSERACT PASS
+# ==============================
+
+class OcrLine:
+    """One line of Tesseract output, keeping each word's confidence."""
+
+    def __init__(self, words):
+        self.words = words
+        self.text = " ".join(w for w, _ in words)
+
+    def confidence(self, start, end):
+        # Mean confidence of the words overlapping text[start:end]
+        confs, pos = [], 0
+        for word, conf in self.words:
+            if pos < end and pos + len(word) > start:
+                confs.append(conf)
+            pos += len(word) + 1
+        return sum(confs) / len(confs) if confs else 0.0
+
+
+def load_pages(file_path):
+    if file_path.lower().endswith(".pdf"):
+        if convert_from_path is None:
+            raise RuntimeError("pdf2image is required to OCR PDF documents")
+        return convert_from_path(file_path, dpi=300)
+    return [Image.open(file_path)]
+
+
+def ocr_lines(file_path):
+    lines = []
+    for page in load_pages(file_path):
+        data = pytesseract.image_to_data(page, output_type=pytesseract.Output.DICT)
+        grouped = {}
+        for i, word in enumerate(data["text"]):
+            word, conf = word.strip(), float(data["conf"][i])
+            if not word or conf < 0:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            grouped.setdefault(key, []).append((word, conf / 100))
+        lines.extend(OcrLine(words) for words in grouped.values())
+    return lines
+
+
+def extract_text_from_pdf(pdf_path):
+    if pytesseract is None:
+        raise RuntimeError("pytesseract is not installed")
+    return "\n".join(line.text for line in ocr_lines(pdf_path))
+
+
+# ==============================
+# 🧾 LOCAL EXTRACTION
+# ==============================
+
+def local_extract(file_path):
+    """Tesseract + regex extraction with a confidence (0-1) per field.
+
+    Returns the same keys as ai_service.gemini_ocr plus `field_confidence`,
+    so either result can feed the rest of the pipeline.
+    """
+    started = time.perf_counter()
+    result = {
+        "patient_name": "",
+        "policy_number": "",
+        "claim_amount": 0,
+        "has_signature": None,
+        "has_stamp": None,
+        "text_clarity": "",
+        "admission_date": "",
+        "claim_date": "",
+        "extraction_confidence": 0,
+        "field_confidence": {}
+    }
+    if pytesseract is None:
+        return result
+
+    try:
+        lines = ocr_lines(file_path)
+    except Exception as e:
+        # Missing tesseract/poppler binaries or an unreadable file: leave every
+        # field unconfident so the whole document goes to Gemini
+        print(f"\n⚠️ Local OCR failed, escalating {file_path}: {e}")
+        result["local_error"] = str(e)
+        return result
+
+    # Collect every candidate value with its confidence
+    candidates = {}
+    for field, pattern, weight in FIELD_PATTERNS:
+        for line in lines:
+            for match in re.finditer(pattern, line.text, re.IGNORECASE):
+                value = normalize_value(field, match.group(1))
+                if value in (None, ""):
+                    continue
+                conf = weight * line.confidence(*match.span(1))
+                candidates.setdefault(field, []).append((conf, value))
+
+    for field, found in candidates.items():
+        conf, value = max(found, key=lambda c: c[0])
+        # Disagreeing candidates of similar strength make the pick less certain
+        if any(v != value and c >= conf * 0.8 for c, v in found):
+            conf *= 0.6
+        result[field] = value
+        result["field_confidence"][field] = round(conf, 2)
+
+    word_confs = [conf for line in lines for _, conf in line.words]
+    mean_conf = sum(word_confs) / len(word_confs) if word_confs else 0.0
+    result["text_clarity"] = "good" if mean_conf >= 0.85 else ("acceptable" if mean_conf >= 0.6 else "poor")
+    result["extraction_confidence"] = overall_confidence(result)
+    result["local_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def overall_confidence(extracted, default=0):
+    # Mean over the text fields that were read; a field missing from the
+    # document is not counted against the ones that were found
+    confs = extracted.get("field_confidence", {})
+    found = [confs[f] for f in ESCALATION_FIELDS if f in confs]
+    return round(sum(found) / len(found), 2) if found else default
+
+
+# ==============================
+# ⬆️ ESCALATION
+# ==============================
+
+def fields_to_escalate(extracted, threshold=CONFIDENCE_THRESHOLD):
+    confs = extracted.get("field_confidence", {})
+    return [f for f in ESCALATION_FIELDS if confs.get(f, 0) < threshold]
+
+
+def merge_extractions(local, remote, escalated_fields):
+    # Keep confident local fields, take Gemini's for the rest
+    merged = dict(local)
+    merged["field_confidence"] = dict(local.get("field_confidence", {}))
+
+    if "error" not in remote:
+        remote_conf = remote.get("extraction_confidence", 0) or 0
+        for field in escalated_fields:
+            value = remote.get(field)
+            if value in (None, ""):
+                # Gemini could not read it either: drop the unconfident local guess
+                merged[field] = 0 if field == "claim_amount" else ""
+                merged["field_confidence"].pop(field, None)
+                continue
+            merged[field] = value
+            merged["field_confidence"][field] = remote_conf
+        for field in VISUAL_FIELDS:
+            if remote.get(field) not in (None, ""):
+                merged[field] = remote[field]
+        merged["extraction_confidence"] = overall_confidence(merged, default=remote_conf)
+
+    merged["ocr_tier"] = "gemini"
+    merged["escalated_fields"] = list(escalated_fields)
+    return merged
+
+
+# ==============================
+# 📊 ESCALATION RATE
+# ==============================
+
+_stats_lock = threading.Lock()
+_stats = {"documents": 0, "escalated": 0}
+
+
+def record_extraction(escalated):
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["escalated"] += int(escalated)
+
+
+def escalation_stats():
+    with _stats_lock:
+        docs, escalated = _stats["documents"], _stats["escalated"]
+    return {
+        "documents": docs,
+        "escalated": escalated,
+        "handled_locally": docs - escalated,
+        "escalation_rate": round(escalated / docs, 3) if docs else 0.0
+    }
@@ -0,0 +1,229 @@
+import gzip
+import json
+import zlib
+from flask import request, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# ==============================
+# ⚙️ RESPONSE SETTINGS
+# ==============================
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson")
+
+# Fast settings suited to per-request (dynamic) compression
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Claims per streamed NDJSON chunk
+NDJSON_CHUNK_ROWS = 200
+
+
+# ==============================
+# ⚡ FAST JSON
+# ==============================
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed."""
+
+    def _encode(self, obj, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or set(kwargs) - {"separators"}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._encode(obj).decode("utf-8")
+        except TypeError:  # e.g. integers wider than 64 bits
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = self._encode(obj, pretty) + b"\n"
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def encode_line(obj):
+    # One compact NDJSON line as bytes
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return (json.dumps(obj, separators=(",", ":"), default=DefaultJSONProvider.default) + "\n").encode("utf-8")
+
+
+# ==============================
+# ✂️ SPARSE FIELDSETS
+# ==============================
+
+def parse_fields(raw):
+    """Turn `?fields=status,hitl.action` into {"status": True, "hitl": {"action": True}}.
+
+    Returns None when no fieldset was requested. A bare name wins over any
+    dotted paths below it ("hitl,hitl.action" keeps all of hitl).
+    """
+    if not raw:
+        return None
+    spec = {}
+    for path in filter(None, (p.strip() for p in raw.split(","))):
+        node = spec
+        *parents, leaf = path.split(".")
+        for part in parents:
+            if node.get(part) is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = True
+    return spec
+
+
+def sparse(obj, spec):
+    # Keep only the requested keys; lists apply the same spec to every item
+    if spec is None or spec is True:
+        return obj
+    if isinstance(obj, dict):
+        return {key: sparse(obj[key], sub) for key, sub in spec.items() if key in obj}
+    if isinstance(obj, list):
+        return [sparse(item, spec) for item in obj]
+    return obj
+
+
+def requested_fields():
+    return parse_fields(request.args.get("fields"))
+
+
+# ==============================
+# 🗜️ COMPRESSION
+# ==============================
+
+def choose_encoding(accept_encoding):
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    def allowed(coding):
+        return accepted.get(coding, accepted.get("*", 0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response):
+    """after_request hook: compress buffered JSON bodies above COMPRESS_MIN_BYTES."""
+    if (
+        response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding:
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def compress_stream(chunks, encoding):
+    # Flush after every chunk so clients can parse rows as they arrive
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+# ==============================
+# 🌊 NDJSON STREAMING
+# ==============================
+
+def wants_ndjson():
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson"
+
+
+def ndjson_response(rows, headers=None):
+    """Stream `rows` as NDJSON, one row per line.
+
+    Anything that is not a row (e.g. summary stats) goes in `headers`, so
+    every line of the body has the same shape.
+    """
+
+    def chunks():
+        batch = []
+        for row in rows:
+            batch.append(encode_line(row))
+            if len(batch) >= NDJSON_CHUNK_ROWS:
+                yield b"".join(batch)
+                batch = []
+        if batch:
+            yield b"".join(batch)
+
+    body = chunks()
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding:
+        body = compress_stream(body, encoding)
+
+    response = Response(stream_with_context(body), mimetype="application/x-ndjson", headers=headers)
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
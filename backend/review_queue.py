@@ -0,0 +1,176 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, update, or_
+from sqlalchemy.orm import Session
+from models.database import db, Claim
+
+# ==============================
+# ⚙️ QUEUE SETTINGS
+# ==============================
+
+# HITL actions (see ai_service.apply_hitl_logic) that need a human decision
+REVIEW_ACTIONS = ("needs_confirmation", "manual_review")
+
+# Claim statuses that can still be reviewed
+REVIEWABLE_STATUSES = ("pending", "under_review")
+
+DEFAULT_LEASE_SECONDS = 300
+MAX_LEASE_SECONDS = 3600
+MAX_BATCH_SIZE = 50
+
+
+# ==============================
+# 🔍 QUEUE FILTERS
+# ==============================
+
+@event.listens_for(Session, 'before_flush')
+def flag_for_review(session, flush_context, instances):
+    """Keep Claim.needs_review in step with status and hitl_action.
+
+    A single flag (rather than two IN lists) lets ix_claims_review_queue
+    supply the lease order. Bulk query.update() calls bypass this hook and
+    must not touch status/hitl_action.
+    """
+    for claim in list(session.new) + list(session.dirty):
+        if isinstance(claim, Claim):
+            needs_review = claim.hitl_action in REVIEW_ACTIONS and (claim.status or 'draft') in REVIEWABLE_STATUSES
+            if claim.needs_review != needs_review:
+                claim.needs_review = needs_review
+
+
+def _available(now):
+    # A claim is up for grabs if it needs review and nobody holds a live lease on it
+    return (
+        Claim.needs_review == True,
+        or_(Claim.review_lease_expires_at.is_(None), Claim.review_lease_expires_at < now)
+    )
+
+
+def _priority():
+    # Riskiest claims first, oldest first within the same risk (matches ix_claims_review_queue)
+    return (Claim.rejection_probability.desc(), Claim.created_at.asc())
+
+
+def _clamp(value, default, maximum):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(maximum, value))
+
+
+# ==============================
+# 📥 LEASE NEXT CLAIMS
+# ==============================
+
+def lease_next(reviewer_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Atomically lease up to `limit` claims for a reviewer.
+
+    The candidate SELECT and the lease UPDATE run as one statement, so two
+    reviewers can never walk away with the same claim:
+    - PostgreSQL: the sub-select uses FOR UPDATE SKIP LOCKED, so concurrent
+      reviewers skip rows another transaction is leasing instead of waiting.
+    - SQLite: a single UPDATE holds the database write lock, and the outer
+      WHERE re-checks availability, which gives the same guarantee.
+    """
+    limit = _clamp(limit, 1, MAX_BATCH_SIZE)
+    lease_seconds = _clamp(lease_seconds, DEFAULT_LEASE_SECONDS, MAX_LEASE_SECONDS)
+
+    now = datetime.utcnow()
+    token = str(uuid.uuid4())
+
+    # Reviewers never get their own claims
+    candidates = (
+        select(Claim.id)
+        .where(*_available(now), Claim.user_id != int(reviewer_id))
+        .order_by(*_priority())
+        .limit(limit)
+    )
+    if db.engine.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    leased = db.session.execute(
+        update(Claim)
+        .where(Claim.id.in_(candidates.scalar_subquery()), *_available(now))
+        .values(
+            review_owner=str(reviewer_id),
+            review_token=token,
+            review_lease_expires_at=now + timedelta(seconds=lease_seconds)
+        )
+        .returning(Claim.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.commit()
+
+    # Re-read by primary key rather than scanning for the token
+    return Claim.query.filter(Claim.id.in_(leased)).order_by(*_priority()).all()
+
+
+# ==============================
+# 🔁 RENEW / RELEASE / DECIDE
+# ==============================
+
+def _held_by(claim_uuid, reviewer_id, now):
+    return Claim.query.filter(
+        Claim.claim_uuid == claim_uuid,
+        Claim.review_owner == str(reviewer_id),
+        Claim.review_lease_expires_at >= now
+    )
+
+
+def renew_lease(claim_uuid, reviewer_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    now = datetime.utcnow()
+    lease_seconds = _clamp(lease_seconds, DEFAULT_LEASE_SECONDS, MAX_LEASE_SECONDS)
+
+    updated = _held_by(claim_uuid, reviewer_id, now).update(
+        {"review_lease_expires_at": now + timedelta(seconds=lease_seconds)},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return updated == 1
+
+
+def release_lease(claim_uuid, reviewer_id):
+    # Hand the claim back to the queue without a decision
+    updated = _held_by(claim_uuid, reviewer_id, datetime.utcnow()).update(
+        {"review_owner": None, "review_token": None, "review_lease_expires_at": None},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return updated == 1
+
+
+def complete_review(claim_uuid, reviewer_id, decision):
+    if decision not in ("approved", "rejected"):
+        raise ValueError("Decision must be 'approved' or 'rejected'")
+
+    # Loaded and changed through the ORM (not a bulk update) so the status
+    # change reaches the claim_rollups hook in rollups.py
+    claim = _held_by(claim_uuid, reviewer_id, datetime.utcnow()).with_for_update().first()
+    if not claim:
+        db.session.rollback()
+        return False
+    if claim.user_id == int(reviewer_id):
+        db.session.rollback()
+        raise PermissionError("Reviewers cannot decide their own claims")
+
+    claim.status = decision
+    claim.hitl_action = "reviewed"
+    claim.review_token = None
+    claim.review_lease_expires_at = None
+    db.session.commit()
+    return True
+
+
+# ==============================
+# 📊 QUEUE DEPTH
+# ==============================
+
+def queue_stats():
+    now = datetime.utcnow()
+    waiting = Claim.query.filter(*_available(now)).count()
+    leased = Claim.query.filter(
+        Claim.needs_review == True,
+        Claim.review_lease_expires_at >= now
+    ).count()
+    return {"waiting": waiting, "leased": leased}
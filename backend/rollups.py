@@ -0,0 +1,235 @@
+import click
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask.cli import AppGroup
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import sqlite, postgresql
+from models.database import db, Claim, ClaimRollup, ClaimGlobalRollup
+
+# ==============================
+# 🔑 ROLLUP KEYS
+# ==============================
+
+# Per-user rows feed the dashboards; the global rows feed the admin analytics
+KEY_COLUMNS = {
+    ClaimRollup: ('user_id', 'insurance_type', 'status', 'day'),
+    ClaimGlobalRollup: ('insurance_type', 'status', 'day')
+}
+
+def _key(user_id, insurance_type, status, created_at):
+    # Normalised so an ORM object and a raw DB row for the same claim agree
+    return (int(user_id), insurance_type or '', status or 'draft', created_at.date())
+
+
+def _upsert(connection, model, key, count, amount):
+    table = model.__table__
+    values = dict(zip(KEY_COLUMNS[model], key), claim_count=count, total_amount=amount)
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(table).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS[model]),
+        set_={
+            'claim_count': table.c.claim_count + stmt.excluded.claim_count,
+            'total_amount': table.c.total_amount + stmt.excluded.total_amount
+        }
+    )
+    connection.execute(stmt)
+
+
+# ==============================
+# 🔁 INCREMENTAL MAINTENANCE
+# ==============================
+
+@event.listens_for(Session, 'before_flush')
+def update_rollups(session, flush_context, instances):
+    """Apply each flushed Claim's delta to claim_rollups in the same transaction.
+
+    Old values are read from the claims table itself (still unchanged at this
+    point), so the delta is right even if the ORM never loaded them. Bulk
+    query.update() calls bypass this hook and must not touch status/amount.
+    """
+    new = [o for o in session.new if isinstance(o, Claim)]
+    dirty = [o for o in session.dirty if isinstance(o, Claim) and session.is_modified(o)]
+    deleted = [o for o in session.deleted if isinstance(o, Claim)]
+    if not (new or dirty or deleted):
+        return
+
+    deltas = defaultdict(lambda: [0, 0.0])
+    connection = session.connection()
+
+    ids = [o.id for o in dirty + deleted if o.id is not None]
+    if ids:
+        t = Claim.__table__
+        rows = connection.execute(
+            select(t.c.id, t.c.user_id, t.c.insurance_type, t.c.status, t.c.created_at, t.c.claim_amount)
+            .where(t.c.id.in_(ids))
+        )
+        for row in rows:
+            delta = deltas[_key(row.user_id, row.insurance_type, row.status, row.created_at)]
+            delta[0] -= 1
+            delta[1] -= row.claim_amount or 0
+
+    for claim in new + dirty:
+        # Fill Python-side defaults now so the rollup day matches the stored row
+        if claim.created_at is None:
+            claim.created_at = datetime.utcnow()
+        if claim.status is None:
+            claim.status = 'draft'
+        delta = deltas[_key(claim.user_id, claim.insurance_type, claim.status, claim.created_at)]
+        delta[0] += 1
+        delta[1] += float(claim.claim_amount or 0)
+
+    global_deltas = defaultdict(lambda: [0, 0.0])
+    for (user_id, *key), (count, amount) in deltas.items():
+        delta = global_deltas[tuple(key)]
+        delta[0] += count
+        delta[1] += amount
+
+    for model, changes in ((ClaimRollup, deltas), (ClaimGlobalRollup, global_deltas)):
+        for key, (count, amount) in changes.items():
+            if count or abs(amount) > 1e-9:
+                _upsert(connection, model, key, count, round(amount, 2))
+
+
+# ==============================
+# 📊 READS
+# ==============================
+
+def status_totals(user_id=None):
+    # {status: (count, amount)} straight from the rollups, for one user or everyone
+    model = ClaimGlobalRollup if user_id is None else ClaimRollup
+    query = db.session.query(
+        model.status,
+        func.sum(model.claim_count),
+        func.sum(model.total_amount)
+    )
+    if user_id is not None:
+        query = query.filter(ClaimRollup.user_id == int(user_id))
+    return {status: (count or 0, amount or 0.0) for status, count, amount in query.group_by(model.status)}
+
+
+def dashboard_stats(user_id):
+    # Same shape as the stats block get_claims used to compute per request
+    totals = status_totals(user_id)
+    return {
+        "total": sum(c for c, _ in totals.values()),
+        "approved": totals.get('approved', (0, 0))[0],
+        "pending": totals.get('pending', (0, 0))[0],
+        "rejected": totals.get('rejected', (0, 0))[0],
+        "total_amount": round(sum(a for _, a in totals.values()), 2)
+    }
+
+
+def analytics(days=30):
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    # Global rows only: their number depends on types x statuses x days, not on users
+    by_type = db.session.query(
+        ClaimGlobalRollup.insurance_type,
+        func.sum(ClaimGlobalRollup.claim_count),
+        func.sum(ClaimGlobalRollup.total_amount)
+    ).group_by(ClaimGlobalRollup.insurance_type)
+
+    by_day = db.session.query(
+        ClaimGlobalRollup.day,
+        func.sum(ClaimGlobalRollup.claim_count),
+        func.sum(ClaimGlobalRollup.total_amount)
+    ).filter(ClaimGlobalRollup.day >= since).group_by(ClaimGlobalRollup.day).order_by(ClaimGlobalRollup.day)
+
+    return {
+        "by_status": {s: {"count": c, "amount": round(a, 2)} for s, (c, a) in status_totals().items()},
+        "by_insurance_type": {t or 'unknown': {"count": c or 0, "amount": round(a or 0, 2)} for t, c, a in by_type},
+        "daily": [{"day": d.isoformat(), "count": c or 0, "amount": round(a or 0, 2)} for d, c, a in by_day]
+    }
+
+
+# ==============================
+# 🛠️ REBUILD / VERIFY
+# ==============================
+
+def _from_claims(model):
+    # Ground-truth aggregation over the claims table, grouped like `model`
+    keys = [
+        func.coalesce(Claim.insurance_type, ''),
+        func.coalesce(Claim.status, 'draft'),
+        func.date(Claim.created_at)
+    ]
+    if model is ClaimRollup:
+        keys.insert(0, Claim.user_id)
+    return select(
+        *keys,
+        func.count(Claim.id),
+        func.coalesce(func.sum(Claim.claim_amount), 0.0)
+    ).group_by(*keys)
+
+
+def _fill(connection, models=tuple(KEY_COLUMNS)):
+    for model in models:
+        connection.execute(
+            model.__table__.insert().from_select(
+                [*KEY_COLUMNS[model], 'claim_count', 'total_amount'],
+                _from_claims(model)
+            )
+        )
+
+
+@event.listens_for(db.metadata, 'after_create')
+def backfill_new_rollups(target, connection, tables=(), **kw):
+    # create_all() on a database that already has claims creates the rollup
+    # tables empty; fill them straight away so no dashboard starts at zero
+    created = {table.name for table in tables}
+    _fill(connection, [model for model in KEY_COLUMNS if model.__tablename__ in created])
+
+
+def rebuild():
+    for model in KEY_COLUMNS:
+        db.session.query(model).delete(synchronize_session=False)
+    _fill(db.session.connection())
+    db.session.commit()
+    return sum(db.session.query(model).count() for model in KEY_COLUMNS)
+
+
+def verify():
+    # Returns a list of (key, expected, actual) for every rollup row that drifted;
+    # keys start with the table name
+    def norm_day(day):
+        return day if not isinstance(day, str) else datetime.strptime(day, '%Y-%m-%d').date()
+
+    mismatches = []
+    for model, columns in KEY_COLUMNS.items():
+        expected = {
+            (model.__tablename__, *key, norm_day(day)): (c, round(a or 0, 2))
+            for *key, day, c, a in db.session.execute(_from_claims(model))
+        }
+        actual = {
+            (model.__tablename__, *(getattr(r, col) for col in columns)): (r.claim_count, round(r.total_amount, 2))
+            for r in model.query.all()
+            if r.claim_count or abs(r.total_amount) > 0.005
+        }
+        mismatches.extend(
+            (key, expected.get(key, (0, 0.0)), actual.get(key, (0, 0.0)))
+            for key in sorted(set(expected) | set(actual))
+            if expected.get(key, (0, 0.0)) != actual.get(key, (0, 0.0))
+        )
+    return mismatches
+
+
+rollups_cli = AppGroup('rollups', help="Maintain the claim rollup analytics tables.")
+
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Recompute the rollup tables from the claims table."""
+    click.echo(f"Rebuilt {rebuild()} rollup rows")
+
+
+@rollups_cli.command('verify')
+def verify_command():
+    """Compare the rollup tables against the claims table."""
+    mismatches = verify()
+    for key, expected, actual in mismatches:
+        click.echo(f"{key}: expected {expected}, found {actual}")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} rollup rows out of sync; run 'flask rollups rebuild'")
+    click.echo("Rollups match the claims table")
@@ -1,11 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from models.database import db, User  # <--- Clean SQLAlchemy import
+from functools import wraps
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
+def is_reviewer(user):
+    # Reviewer flag on the user, or an email in the REVIEWER_EMAILS allow-list
+    return bool(user) and (user.is_reviewer or user.email in current_app.config.get('REVIEWER_EMAILS', ()))
+
+def reviewer_required(fn):
+    # jwt_required() plus a 403 for users who are not reviewers
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_reviewer(db.session.get(User, int(get_jwt_identity()))):
+            return jsonify({'error': 'Reviewer access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
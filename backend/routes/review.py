@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from routes.auth import reviewer_required
+from review_queue import lease_next, renew_lease, release_lease, complete_review, queue_stats
+import json
+
+review_bp = Blueprint('review', __name__)
+
+def serialize_claim(c):
+    return {
+        "claim_uuid": c.claim_uuid,
+        "insurance_type": c.insurance_type,
+        "status": c.status,
+        "hitl_action": c.hitl_action,
+        "rejection_probability": c.rejection_probability,
+        "health_score": c.health_score,
+        "created_at": c.created_at.isoformat(),
+        "lease_expires_at": c.review_lease_expires_at.isoformat() if c.review_lease_expires_at else None,
+        "documents": [
+            {
+                "filename": d.filename,
+                "doc_type": d.doc_type,
+                "is_verified": d.is_verified,
+                "yolo_data": json.loads(d.yolo_data or '{}')
+            }
+            for d in c.documents
+        ]
+    }
+
+# 1. Queue Depth
+@review_bp.route('/queue', methods=['GET'])
+@reviewer_required
+def get_queue():
+    return jsonify(queue_stats())
+
+# 2. Lease the next batch of claims (highest risk, oldest first)
+@review_bp.route('/lease', methods=['POST'])
+@reviewer_required
+def lease():
+    reviewer_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    claims = lease_next(reviewer_id, data.get('limit', 1), data.get('lease_seconds'))
+    return jsonify({"claims": [serialize_claim(c) for c in claims]})
+
+# 3. Extend a lease while still working on the claim
+@review_bp.route('/<uuid>/renew', methods=['POST'])
+@reviewer_required
+def renew(uuid):
+    data = request.get_json(silent=True) or {}
+    if not renew_lease(uuid, get_jwt_identity(), data.get('lease_seconds')):
+        return jsonify({'error': 'Lease not held or already expired'}), 409
+    return jsonify({"success": True})
+
+# 4. Put a claim back in the queue without deciding
+@review_bp.route('/<uuid>/release', methods=['POST'])
+@reviewer_required
+def release(uuid):
+    if not release_lease(uuid, get_jwt_identity()):
+        return jsonify({'error': 'Lease not held or already expired'}), 409
+    return jsonify({"success": True})
+
+# 5. Record the reviewer's decision
+@review_bp.route('/<uuid>/decision', methods=['POST'])
+@reviewer_required
+def decide(uuid):
+    data = request.get_json(silent=True) or {}
+    decision = data.get('decision')
+    if decision not in ('approved', 'rejected'):
+        return jsonify({'error': "Decision must be 'approved' or 'rejected'"}), 400
+
+    try:
+        completed = complete_review(uuid, get_jwt_identity(), decision)
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    if not completed:
+        return jsonify({'error': 'Lease not held or already expired'}), 409
+    return jsonify({"success": True, "status": decision})
@@ -0,0 +1,26 @@
+import os
+import pytest
+from flask import Flask
+from models.database import db, User
+
+# ai_service builds its API clients at import time; the tests never call them
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+os.environ.setdefault('GROQ_API_KEY', 'test')
+
+
+@pytest.fixture
+def app(tmp_path):
+    # File-backed SQLite so worker threads share one database
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(tmp_path / 'test.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(name='Claimant', email='claimant@example.com', password='x'),
+            User(name='Reviewer', email='reviewer@example.com', password='x', is_reviewer=True)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
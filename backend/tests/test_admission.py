@@ -0,0 +1,164 @@
+import io
+import time
+import threading
+import pytest
+from flask import Flask
+from admission import MemoryBackend, SqliteBackend, LANES, lane_limit, admission_control
+
+UPLOAD, CHAT = LANES["upload"], LANES["chat"]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_concurrent=4, max_waiting=8):
+        if request.param == "memory":
+            return MemoryBackend(max_concurrent, max_waiting)
+        return SqliteBackend(str(tmp_path / "admission.db"), max_concurrent, max_waiting)
+    return make
+
+
+def test_lane_cap_leaves_room_for_uploads(make_backend):
+    backend = make_backend(max_concurrent=4)
+    chat_limit = lane_limit(CHAT, 4)
+    assert chat_limit == 2
+
+    chats = [backend.acquire("chat", CHAT.priority, chat_limit, 0) for _ in range(3)]
+    assert chats[2] is None
+
+    uploads = [backend.acquire("upload", UPLOAD.priority, lane_limit(UPLOAD, 4), 0) for _ in range(3)]
+    assert None not in uploads[:2] and uploads[2] is None
+
+    backend.release(chats[0])
+    assert backend.acquire("chat", CHAT.priority, chat_limit, 0) is not None
+
+
+def test_freed_slot_goes_to_the_higher_priority_lane(make_backend):
+    backend = make_backend(max_concurrent=1)
+    held = backend.acquire("upload", UPLOAD.priority, 1, 0)
+    order = []
+
+    def wait(lane, priority):
+        slot = backend.acquire(lane, priority, 1, 5)
+        if slot is not None:
+            order.append(lane)
+            backend.release(slot)
+
+    chat = threading.Thread(target=wait, args=("chat", CHAT.priority))
+    chat.start()
+    time.sleep(0.1)
+    upload = threading.Thread(target=wait, args=("upload", UPLOAD.priority))
+    upload.start()
+    time.sleep(0.1)
+
+    # The chat request queued first, but the upload is served first
+    backend.release(held)
+    upload.join()
+    chat.join()
+    assert order == ["upload", "chat"]
+
+
+def test_queue_is_bounded_and_times_out(make_backend):
+    backend = make_backend(max_concurrent=1, max_waiting=1)
+    backend.acquire("upload", UPLOAD.priority, 1, 0)
+
+    waiter = threading.Thread(target=backend.acquire, args=("upload", UPLOAD.priority, 1, 0.5))
+    waiter.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert backend.acquire("upload", UPLOAD.priority, 1, 5) is None  # queue full: refused at once
+    assert time.monotonic() - started < 1
+    waiter.join()
+
+
+def test_token_bucket_and_refund(make_backend):
+    backend = make_backend()
+    assert [backend.take_token("chat:1", 2, 1 / 60) for _ in range(2)] == [0, 0]
+    assert backend.take_token("chat:1", 2, 1 / 60) > 0
+    assert backend.take_token("chat:2", 2, 1 / 60) == 0  # buckets are per user
+
+    backend.refund_token("chat:1", 2)
+    assert backend.take_token("chat:1", 2, 1 / 60) == 0
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-secret-key-that-is-long-enough", ADMISSION_MAX_CONCURRENT=1,
+                      ADMISSION_MAX_WAITING=0, ADMISSION_WAIT_TIMEOUT=0.1)
+    from flask_jwt_extended import JWTManager
+    JWTManager(app)
+
+    gate = threading.Event()
+
+    @app.route("/slow", methods=["POST"])
+    @admission_control("upload")
+    def slow():
+        gate.wait(5)
+        return {"ok": True}
+
+    @app.route("/fast", methods=["POST"])
+    @admission_control("upload")
+    def fast():
+        return {"ok": True}
+
+    app.gate = gate
+    return app.test_client()
+
+
+def test_rate_limit_returns_429_with_retry_after(client):
+    for _ in range(UPLOAD.burst):
+        assert client.post("/fast").status_code == 200
+
+    response = client.post("/fast")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["retry_after"] == int(response.headers["Retry-After"])
+
+
+def test_busy_server_does_not_drain_the_bucket(client):
+    holder = threading.Thread(target=client.post, args=("/slow",))
+    holder.start()
+    time.sleep(0.1)
+
+    # Every request is turned away for load, none for the caller's rate
+    for _ in range(UPLOAD.burst * 2):
+        response = client.post("/fast")
+        assert response.status_code == 429
+        assert response.get_json()["error"].startswith("Server is busy")
+
+    client.application.gate.set()
+    holder.join()
+    for _ in range(UPLOAD.burst - 1):
+        assert client.post("/fast").status_code == 200
+
+
+def test_rejected_uploads_do_not_use_admission(app, tmp_path, monkeypatch):
+    claims = pytest.importorskip("routes.claims")
+    from flask_jwt_extended import JWTManager, create_access_token
+    from models.database import db, Claim
+
+    monkeypatch.setattr(claims, "analyze_document", lambda path, insurance_type: {"health_score": 0})
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    app.config.update(JWT_SECRET_KEY="test-secret-key-that-is-long-enough", UPLOAD_FOLDER=str(uploads))
+    JWTManager(app)
+    app.register_blueprint(claims.claims_bp, url_prefix="/api/claims")
+    claim = Claim(user_id=1, insurance_type="health")
+    db.session.add(claim)
+    db.session.commit()
+
+    client = app.test_client()
+    headers = {"Authorization": "Bearer " + create_access_token(identity="1")}
+
+    def upload(claim_uuid, filename="bill.png"):
+        data = {"claim_uuid": claim_uuid, "doc_type": "Hospital Bill", "file": (io.BytesIO(b"png"), filename)}
+        return client.post("/api/claims/upload-doc", data=data, headers=headers).status_code
+
+    # Malformed uploads and unknown claims are refused before any token is taken
+    for _ in range(UPLOAD.burst):
+        assert upload(claim.claim_uuid, "bill.exe") == 400
+        assert upload("no-such-claim") == 404
+    assert [upload(claim.claim_uuid) for _ in range(UPLOAD.burst + 1)] == [200] * UPLOAD.burst + [429]
+    # A rate-limited upload leaves no file behind
+    assert len(list(uploads.iterdir())) == UPLOAD.burst
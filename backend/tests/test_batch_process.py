@@ -0,0 +1,119 @@
+import json
+import asyncio
+import tarfile
+import zipfile
+import pytest
+from sqlalchemy.exc import StatementError
+from models.database import Claim
+
+# Needs the full pipeline dependencies (OpenCV, Gemini/Groq clients)
+batch_process = pytest.importorskip("batch_process")
+
+RESULT = {
+    "blur_analysis": {"is_blurry": False},
+    "extracted_data": {"claim_amount": "45,250"},
+    "rejection_probability": 0.4,
+    "health_score": 71.0,
+    "hitl": {"action": "manual_review"}
+}
+
+
+def make_tree(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"scan:" + name.encode())
+    return root
+
+
+def test_sources_list_supported_documents(tmp_path):
+    tree = make_tree(tmp_path / "scans", ["b.png", "a/bill.PDF", "notes.txt", "a/z.jpeg"])
+    with zipfile.ZipFile(tmp_path / "dump.zip", "w") as z:
+        z.write(tree / "b.png", "b.png")
+        z.writestr("readme.md", "skip me")
+    with tarfile.open(tmp_path / "dump.tar.gz", "w:gz") as t:
+        t.add(tree / "a" / "z.jpeg", "a/z.jpeg")
+
+    assert list(batch_process.open_source(str(tree)).keys()) == ["b.png", "a/bill.PDF", "a/z.jpeg"]
+    assert list(batch_process.open_source(str(tmp_path / "dump.zip")).keys()) == ["b.png"]
+    assert list(batch_process.open_source(str(tmp_path / "dump.tar.gz")).keys()) == ["a/z.jpeg"]
+    with pytest.raises(ValueError):
+        batch_process.open_source(str(tree / "notes.txt"))
+
+
+def test_archive_members_are_extracted_and_cleaned_up(tmp_path):
+    with zipfile.ZipFile(tmp_path / "dump.zip", "w") as z:
+        z.writestr("folder/bill.png", b"png-bytes")
+    source = batch_process.open_source(str(tmp_path / "dump.zip"))
+    path, cleanup = source.materialize("folder/bill.png", str(tmp_path))
+    source.close()
+
+    assert cleanup and path.endswith("_bill.png")
+    with open(path, "rb") as f:
+        assert f.read() == b"png-bytes"
+
+
+def test_checkpoint_survives_a_restart(tmp_path):
+    checkpoint = batch_process.Checkpoint(str(tmp_path / "run.checkpoint"))
+    checkpoint.mark("/data/a/doc.png")
+    checkpoint.close()
+
+    checkpoint = batch_process.Checkpoint(str(tmp_path / "run.checkpoint"))
+    assert checkpoint.done == {"/data/a/doc.png"}
+    checkpoint.close()
+
+
+def test_same_name_in_two_sources_is_not_skipped(tmp_path, monkeypatch):
+    async def fake_process_one(path, pool, batcher):
+        with open(path, "rb") as f:
+            return {"content": f.read().decode()}
+
+    monkeypatch.setattr(batch_process, "process_one", fake_process_one)
+    monkeypatch.chdir(tmp_path)
+    make_tree(tmp_path / "a", ["doc.png"])
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "doc.png").write_bytes(b"partner b")
+
+    for source in ("a", "b", "a"):
+        progress = asyncio.run(batch_process.run(batch_process.parse_args([source, "--workers", "1"])))
+    assert (progress.done, progress.skipped) == (0, 1)  # second run of "a" resumes
+
+    with open(tmp_path / "batch_results.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    assert [r["source"] for r in rows] == [str(tmp_path / "a" / "doc.png"), str(tmp_path / "b" / "doc.png")]
+    assert [r["content"] for r in rows] == ["scan:doc.png", "partner b"]
+
+
+def test_database_writer_creates_pending_claims(app):
+    writer = batch_process.DatabaseWriter(1, "health", app=app)
+    writer.write("/data/a/bill.png", RESULT)
+    writer.write("/data/a/broken.png", {"error": "unreadable"})
+    writer.close()
+
+    claim = Claim.query.one()
+    assert claim.claim_number.startswith("CLM")
+    assert (claim.status, claim.claim_amount, claim.hitl_action) == ("pending", 45250.0, "manual_review")
+    assert claim.needs_review
+    assert [d.filename for d in claim.documents] == ["bill.png"]
+
+
+def test_database_writer_retries_claim_number_collisions(app):
+    writer = batch_process.DatabaseWriter(1, "health", app=app)
+    numbers = iter(["CLM1", "CLM1", "CLM2"])
+    writer.generate_claim_number = lambda: next(numbers)
+
+    writer.write("one.png", RESULT)
+    writer.write("two.png", RESULT)
+    writer.close()
+    assert sorted(c.claim_number for c in Claim.query) == ["CLM1", "CLM2"]
+
+
+def test_database_writer_rolls_back_failed_writes(app):
+    writer = batch_process.DatabaseWriter(1, "health", app=app)
+    with pytest.raises(StatementError):
+        writer.write("bad.png", dict(RESULT, health_score=object()))
+
+    # The session is still usable for the rest of the run
+    writer.write("good.png", RESULT)
+    writer.close()
+    assert [d.filename for c in Claim.query for d in c.documents] == ["good.png"]
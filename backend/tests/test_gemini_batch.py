@@ -0,0 +1,122 @@
+import json
+import types
+import pytest
+
+# Needs the pipeline dependencies (OpenCV, Gemini/Groq clients); no request is ever sent
+ai_service = pytest.importorskip("ai_service")
+
+
+def item(index, **fields):
+    return {
+        "index": index, "patient_name": f"Patient {index}", "policy_number": "", "claim_amount": 100 * index,
+        "has_signature": True, "has_stamp": False, "text_clarity": "good", "admission_date": "",
+        "claim_date": "", "extraction_confidence": 0.9, **fields
+    }
+
+
+class FakeGemini:
+    """Stands in for gemini_client: `reply(n)` gets the number of documents sent
+    and returns the raw response text (or raises)."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.batches = []
+        self.models = self
+
+    def generate_content(self, model, contents):
+        n = sum(1 for part in contents[0]["parts"] if "inline_data" in part)
+        self.batches.append(n)
+        return types.SimpleNamespace(text=self.reply(n))
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    singles = []
+    monkeypatch.setattr(ai_service, "batch_sizer", ai_service.BatchSizer(max_docs=8))
+    monkeypatch.setattr(ai_service, "gemini_ocr", lambda path, insurance_type: singles.append(path) or {"single": path})
+
+    def use(reply, n=8):
+        client = FakeGemini(reply)
+        monkeypatch.setattr(ai_service, "gemini_client", client)
+        paths = []
+        for i in range(n):
+            path = tmp_path / f"doc{i}.png"
+            path.write_bytes(b"png")
+            paths.append(str(path))
+        return paths, client, singles
+    return use
+
+
+def test_validate_extraction():
+    full = item(0, claim_amount="45,250.50", policy_number=None, has_stamp=None)
+    assert ai_service.validate_extraction(full) == {
+        "patient_name": "Patient 0", "policy_number": "", "claim_amount": 45250.5, "has_signature": True,
+        "has_stamp": False, "text_clarity": "good", "admission_date": "", "claim_date": "",
+        "extraction_confidence": 0.9
+    }
+    assert ai_service.validate_extraction({"index": 0}) is None  # every field is required
+    assert ai_service.validate_extraction(item(0, claim_amount=True)) is None
+    assert ai_service.validate_extraction(item(0, claim_amount="about 500")) is None
+    assert ai_service.validate_extraction(item(0, has_signature="yes")) is None
+    assert ai_service.validate_extraction("not an object") is None
+
+
+def test_results_are_demultiplexed_by_index(docs):
+    # Out of order, with a duplicate, an out-of-range index and a bool index mixed in
+    reply = json.dumps([item(2), item(0), item(1), item(0, patient_name="Duplicate"), item(9), item(True)])
+    paths, client, singles = docs(lambda n: "```json\n" + reply + "\n```", n=3)
+
+    results = ai_service.gemini_ocr_batch(paths, "health")
+    assert [r["patient_name"] for r in results] == ["Patient 0", "Patient 1", "Patient 2"]
+    assert client.batches == [3] and singles == []
+    assert ai_service.batch_sizer.limit == 8
+
+
+def test_invalid_items_are_retried_one_at_a_time(docs):
+    paths, client, singles = docs(lambda n: json.dumps([item(0), item(1, claim_amount=True), item(2)]), n=3)
+
+    results = ai_service.gemini_ocr_batch(paths, "health")
+    assert results[1] == {"single": paths[1]}
+    assert singles == [paths[1]] and client.batches == [3]
+
+
+def test_truncated_batch_is_resent_in_halves_and_the_shrink_sticks(docs):
+    # The full-size request stops after two documents; smaller ones come back whole
+    def reply(n):
+        return json.dumps([item(i) for i in range(2 if n == 8 else n)])
+
+    paths, client, singles = docs(reply)
+    results = ai_service.gemini_ocr_batch(paths, "health")
+
+    assert client.batches == [8, 4, 2]
+    assert all(r is not None and "single" not in r for r in results)
+    assert singles == []
+    # Clean retry batches do not grow the limit back
+    assert ai_service.batch_sizer.limit == 4
+
+
+def test_unparseable_batches_end_with_single_requests(docs):
+    paths, client, singles = docs(lambda n: "Sorry, I can't help with that.", n=4)
+
+    results = ai_service.gemini_ocr_batch(paths, "health")
+    assert client.batches == [4, 2, 2]
+    assert results == [{"single": p} for p in paths]
+
+
+def test_transport_errors_are_raised(docs):
+    def reply(n):
+        raise ConnectionError("connection reset")
+
+    paths, client, singles = docs(reply)
+    with pytest.raises(ConnectionError):
+        ai_service.gemini_ocr_batch(paths, "health")
+    assert singles == [] and ai_service.batch_sizer.limit == 8
+
+
+def test_gemini_ocr_many_follows_the_sizer(docs):
+    paths, client, singles = docs(lambda n: json.dumps([item(i) for i in range(n)]), n=8)
+    ai_service.batch_sizer.limit = 3
+
+    results = ai_service.gemini_ocr_many(paths, "health")
+    assert client.batches == [3, 3, 2]
+    assert len(results) == 8
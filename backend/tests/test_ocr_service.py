@@ -0,0 +1,122 @@
+import pytest
+import ocr_service
+from ocr_service import OcrLine, normalize_date, fields_to_escalate, merge_extractions, ESCALATION_FIELDS
+
+
+def line(text, conf=0.95):
+    return OcrLine([(word, conf) for word in text.split()])
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    # Run local_extract against canned Tesseract lines
+    def use(lines):
+        monkeypatch.setattr(ocr_service, "pytesseract", object())
+        monkeypatch.setattr(ocr_service, "ocr_lines", lambda path: lines)
+    return use
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2024-03-05", "2024-03-05"),
+    ("05/03/2024", "2024-03-05"),
+    ("5-3-24", "2024-03-05"),
+    ("05.03.2024", "2024-03-05"),
+    ("5 Mar 2024", "2024-03-05"),
+    ("5 March, 2024", "2024-03-05"),
+    ("31/02/2024", None),
+    ("soon", None)
+])
+def test_normalize_date_is_day_first(raw, expected):
+    assert normalize_date(raw) == expected
+
+
+def test_clean_typed_bill_stays_local(fake_ocr):
+    fake_ocr([
+        line("City Hospital Final Bill"),
+        line("Patient Name: ravi kumar"),
+        line("Policy No: HLT-2024/88123"),
+        line("Date of Admission: 05/03/2024"),
+        line("Bill Date: 12/03/2024"),
+        line("Grand Total Rs. 45,250.00")
+    ])
+    result = ocr_service.local_extract("bill.png")
+
+    assert result["patient_name"] == "Ravi Kumar"
+    assert result["policy_number"] == "HLT-2024/88123"
+    assert result["claim_amount"] == 45250.0
+    assert (result["admission_date"], result["claim_date"]) == ("2024-03-05", "2024-03-12")
+    assert fields_to_escalate(result) == []
+    assert result["extraction_confidence"] == 0.95
+    # Signature and stamp are not checked locally
+    assert result["has_signature"] is None and result["has_stamp"] is None
+
+
+def test_unlabelled_or_conflicting_values_escalate(fake_ocr):
+    fake_ocr([
+        line("Patient Name: ravi kumar"),
+        line("Policy No: HLT-2024/88123"),
+        line("Date: 12/03/2024"),
+        line("Consultation Rs. 500"),
+        line("Pharmacy Rs. 520")
+    ])
+    result = ocr_service.local_extract("bill.png")
+
+    # A bare "Date:" and two similar unlabelled amounts are not trusted
+    assert fields_to_escalate(result) == ["claim_amount", "claim_date"]
+
+
+def test_blurry_text_escalates(fake_ocr):
+    fake_ocr([line("Patient Name: ravi kumar", conf=0.5), line("Policy No: HLT-2024/88123")])
+    assert fields_to_escalate(ocr_service.local_extract("bill.png")) == ["patient_name", "claim_amount", "claim_date"]
+
+
+def test_local_failure_escalates_everything(monkeypatch):
+    def broken(path):
+        raise OSError("tesseract is not installed")
+
+    monkeypatch.setattr(ocr_service, "pytesseract", object())
+    monkeypatch.setattr(ocr_service, "load_pages", broken)
+    result = ocr_service.local_extract("bill.png")
+
+    assert "tesseract" in result["local_error"]
+    assert fields_to_escalate(result) == list(ESCALATION_FIELDS)
+
+
+def test_merge_keeps_confident_local_fields():
+    local = {
+        "patient_name": "Ravi Kumar", "policy_number": "HLT-2024/88123", "claim_amount": 500.0, "claim_date": "",
+        "has_signature": None, "has_stamp": None, "text_clarity": "good",
+        "field_confidence": {"patient_name": 0.95, "policy_number": 0.95, "claim_amount": 0.3}
+    }
+    remote = {
+        "patient_name": "R Kumar", "claim_amount": 1020.0, "claim_date": "2024-03-12",
+        "has_signature": True, "has_stamp": False, "text_clarity": "acceptable", "extraction_confidence": 0.9
+    }
+    merged = merge_extractions(local, remote, ["claim_amount", "claim_date"])
+
+    assert merged["patient_name"] == "Ravi Kumar"
+    assert (merged["claim_amount"], merged["claim_date"]) == (1020.0, "2024-03-12")
+    assert (merged["has_signature"], merged["has_stamp"], merged["text_clarity"]) == (True, False, "acceptable")
+    assert merged["extraction_confidence"] == 0.92
+    assert (merged["ocr_tier"], merged["escalated_fields"]) == ("gemini", ["claim_amount", "claim_date"])
+
+
+def test_blank_gemini_field_does_not_lower_confidence():
+    local = {"claim_date": "2024-03-12", "field_confidence": {"claim_date": 0.4}}
+    remote = {
+        "patient_name": "Ravi Kumar", "policy_number": "HLT-2024/88123", "claim_amount": 45250.0,
+        "claim_date": "", "has_signature": True, "has_stamp": True, "extraction_confidence": 0.9
+    }
+    merged = merge_extractions(local, remote, list(ESCALATION_FIELDS))
+
+    # Same score Gemini gave on its own; the unconfirmed local date is dropped
+    assert merged["extraction_confidence"] == 0.9
+    assert merged["claim_date"] == ""
+    assert "claim_date" not in merged["field_confidence"]
+
+
+def test_gemini_error_keeps_local_result():
+    local = {"patient_name": "Ravi Kumar", "has_signature": None, "field_confidence": {"patient_name": 0.95}}
+    merged = merge_extractions(local, {"error": "Invalid JSON from Gemini"}, ["claim_amount"])
+    assert merged["patient_name"] == "Ravi Kumar"
+    assert merged["has_signature"] is None
@@ -0,0 +1,123 @@
+import gzip
+import json
+import zlib
+import pytest
+from flask import Flask, jsonify
+import responses
+from responses import parse_fields, sparse, choose_encoding, ndjson_response, COMPRESS_MIN_BYTES
+
+BR = "br" if responses.brotli else None  # preferred whenever it is installed
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    responses.init_app(app)
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/large")
+    def large():
+        return jsonify({"rows": [{"id": i, "status": "pending"} for i in range(500)]})
+
+    @app.route("/stream")
+    def stream():
+        rows = ({"id": i} for i in range(450))
+        return ndjson_response(rows, headers={"X-Claim-Stats": json.dumps({"total": 450})})
+
+    return app.test_client()
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("") is None
+    assert parse_fields("status, hitl.action,,hitl.status") == {"status": True, "hitl": {"action": True, "status": True}}
+    # A bare name keeps the whole object, in either order
+    assert parse_fields("hitl,hitl.action") == {"hitl": True}
+    assert parse_fields("hitl.action,hitl") == {"hitl": True}
+
+
+def test_sparse_applies_the_spec_to_nested_objects_and_lists():
+    analysis = {
+        "health_score": 92.0,
+        "hitl": {"action": "auto_approve", "status": "approved"},
+        "date_issues": [{"type": "date_mismatch", "severity": "high"}]
+    }
+    spec = parse_fields("hitl.action,date_issues.type,missing")
+    assert sparse(analysis, spec) == {"hitl": {"action": "auto_approve"}, "date_issues": [{"type": "date_mismatch"}]}
+    assert sparse(analysis, None) is analysis
+    assert sparse([{"a": 1, "b": 2}], {"a": True}) == [{"a": 1}]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", BR or "gzip"),
+    ("*, gzip;q=0", BR),
+    ("gzip;q=oops", None),
+    ("br;q=1.0, gzip;q=0.8", BR or "gzip"),
+    ("br;q=0, gzip", "gzip")
+])
+def test_choose_encoding_honours_q_values(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert len(response.data) < COMPRESS_MIN_BYTES
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"ok": True}
+
+
+def test_large_bodies_are_gzipped_when_accepted(client):
+    plain = client.get("/large")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.data) < len(plain.data)
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+
+
+def test_ndjson_lines_are_all_rows_with_stats_in_a_header(client):
+    response = client.get("/stream")
+    assert response.mimetype == "application/x-ndjson"
+    assert json.loads(response.headers["X-Claim-Stats"]) == {"total": 450}
+    lines = response.data.decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": i} for i in range(450)]
+
+
+def test_ndjson_stream_is_compressed_incrementally(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    body = zlib.decompressobj(31).decompress(response.data)
+    assert len(body.decode().splitlines()) == 450
+
+
+def test_claims_list_streams_claims_only(app):
+    claims = pytest.importorskip("routes.claims")
+    from flask_jwt_extended import JWTManager, create_access_token
+    from models.database import db, Claim
+
+    responses.init_app(app)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough"
+    JWTManager(app)
+    app.register_blueprint(claims.claims_bp, url_prefix="/api/claims")
+    db.session.add_all([Claim(user_id=1, status="pending", claim_amount=10.0) for _ in range(3)])
+    db.session.add(Claim(user_id=2, status="approved", claim_amount=99.0))
+    db.session.commit()
+
+    response = app.test_client().get(
+        "/api/claims/all?format=ndjson&fields=claim_uuid,status",
+        headers={"Authorization": "Bearer " + create_access_token(identity="1")}
+    )
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [set(row) for row in rows] == [{"claim_uuid", "status"}] * 3
+    assert json.loads(response.headers["X-Claim-Stats"]) == {
+        "total": 3, "approved": 0, "pending": 3, "rejected": 0, "total_amount": 30.0
+    }
@@ -0,0 +1,154 @@
+import threading
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from models.database import db, Claim
+import review_queue
+
+CLAIMANT, REVIEWER = 1, 2
+
+
+def add_claims(n, user_id=CLAIMANT, **kwargs):
+    for i in range(n):
+        db.session.add(Claim(
+            user_id=user_id,
+            status='pending',
+            hitl_action='manual_review',
+            rejection_probability=kwargs.get('rejection_probability', (i % 10) / 10)
+        ))
+    db.session.commit()
+
+
+def test_concurrent_reviewers_never_share_a_claim(app):
+    add_claims(300)
+    leased = []
+    lock = threading.Lock()
+
+    def reviewer(reviewer_id):
+        with app.app_context():
+            while True:
+                claims = review_queue.lease_next(reviewer_id, limit=20)
+                if not claims:
+                    break
+                with lock:
+                    leased.extend(c.id for c in claims)
+            db.session.remove()
+
+    # Reviewer ids above the claimant's so none of the claims are their own
+    threads = [threading.Thread(target=reviewer, args=(100 + i,)) for i in range(24)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(leased) == 300
+    assert len(set(leased)) == 300
+    assert review_queue.queue_stats() == {"waiting": 0, "leased": 300}
+
+
+def test_lease_order_is_riskiest_then_oldest(app):
+    now = datetime.utcnow()
+    for prob, age in [(0.2, 3), (0.9, 1), (0.9, 2), (0.5, 5)]:
+        db.session.add(Claim(user_id=CLAIMANT, status='pending', hitl_action='manual_review',
+                             rejection_probability=prob, created_at=now - timedelta(hours=age)))
+    db.session.commit()
+
+    claims = review_queue.lease_next(REVIEWER, limit=4)
+    assert [(c.rejection_probability, c.created_at) for c in claims] == [
+        (0.9, now - timedelta(hours=2)),
+        (0.9, now - timedelta(hours=1)),
+        (0.5, now - timedelta(hours=5)),
+        (0.2, now - timedelta(hours=3))
+    ]
+
+
+def test_auto_approved_and_decided_claims_are_not_queued(app):
+    db.session.add(Claim(user_id=CLAIMANT, status='pending', hitl_action='auto_approve'))
+    db.session.add(Claim(user_id=CLAIMANT, status='approved', hitl_action='manual_review'))
+    db.session.commit()
+    assert review_queue.lease_next(REVIEWER, limit=10) == []
+
+
+def test_needs_review_follows_status_and_action(app):
+    claim = Claim(user_id=CLAIMANT, status='draft', hitl_action='pending')
+    db.session.add(claim)
+    db.session.commit()
+    assert not claim.needs_review
+
+    claim.status, claim.hitl_action = 'under_review', 'manual_review'
+    db.session.commit()
+    assert claim.needs_review
+
+    claim.status = 'rejected'
+    db.session.commit()
+    assert not claim.needs_review
+
+
+def test_lease_walks_the_queue_index(app):
+    now = datetime.utcnow()
+    candidates = select(Claim.id).where(*review_queue._available(now)).order_by(*review_queue._priority()).limit(5)
+    sql = str(candidates.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+    # Ordered straight from ix_claims_review_queue, with no sort of the backlog
+    assert "ix_claims_review_queue" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_expired_lease_returns_to_queue(app):
+    add_claims(1)
+    claim = review_queue.lease_next(REVIEWER)[0]
+    assert review_queue.lease_next(3) == []
+
+    claim.review_lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert [c.id for c in review_queue.lease_next(3)] == [claim.id]
+    # The first reviewer lost the lease and can no longer decide
+    assert not review_queue.complete_review(claim.claim_uuid, REVIEWER, 'approved')
+
+
+def test_release_and_decide(app):
+    add_claims(1)
+    claim = review_queue.lease_next(REVIEWER)[0]
+    assert review_queue.release_lease(claim.claim_uuid, REVIEWER)
+
+    claim = review_queue.lease_next(REVIEWER)[0]
+    assert review_queue.complete_review(claim.claim_uuid, REVIEWER, 'rejected')
+    db.session.refresh(claim)
+    assert (claim.status, claim.hitl_action) == ('rejected', 'reviewed')
+    assert review_queue.lease_next(REVIEWER) == []
+
+
+def test_reviewer_never_gets_or_decides_own_claim(app):
+    add_claims(1, user_id=REVIEWER)
+    assert review_queue.lease_next(REVIEWER) == []
+
+    # Even a lease obtained some other way cannot be used to self-approve
+    claim = Claim.query.first()
+    claim.review_owner = str(REVIEWER)
+    claim.review_lease_expires_at = datetime.utcnow() + timedelta(minutes=5)
+    db.session.commit()
+    with pytest.raises(PermissionError):
+        review_queue.complete_review(claim.claim_uuid, REVIEWER, 'approved')
+    assert Claim.query.first().status == 'pending'
+
+
+def test_review_routes_require_a_reviewer(app):
+    from flask_jwt_extended import JWTManager, create_access_token
+    from routes.review import review_bp
+
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-with-enough-length'
+    JWTManager(app)
+    app.register_blueprint(review_bp, url_prefix='/api/review')
+    add_claims(1)
+    client = app.test_client()
+
+    def lease(user_id):
+        token = create_access_token(identity=str(user_id))
+        return client.post('/api/review/lease', json={}, headers={'Authorization': f'Bearer {token}'})
+
+    assert lease(CLAIMANT).status_code == 403
+    response = lease(REVIEWER)
+    assert response.status_code == 200
+    assert len(response.json['claims']) == 1
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from models.database import db, Claim, ClaimRollup, ClaimGlobalRollup
+import rollups  # registers the before_flush hook
+
+CLAIMANT, OTHER = 1, 2
+
+
+def add_claim(**kwargs):
+    claim = Claim(**{"user_id": CLAIMANT, "insurance_type": "health", "status": "pending", **kwargs})
+    db.session.add(claim)
+    db.session.commit()
+    return claim
+
+
+def test_create_update_delete_keep_rollups_in_sync(app):
+    first = add_claim(claim_amount=1000.0)
+    second = add_claim(claim_amount=250.5, insurance_type="vehicle")
+    add_claim(user_id=OTHER, claim_amount=99.0, created_at=datetime.utcnow() - timedelta(days=3))
+    assert rollups.verify() == []
+
+    first.status = "approved"
+    first.claim_amount = 1200.0
+    db.session.commit()
+    assert rollups.verify() == []
+
+    db.session.delete(second)
+    db.session.commit()
+    assert rollups.verify() == []
+    assert rollups.dashboard_stats(CLAIMANT) == {
+        "total": 1, "approved": 1, "pending": 0, "rejected": 0, "total_amount": 1200.0
+    }
+
+
+def test_update_without_loaded_old_values(app):
+    claim_id = add_claim(claim_amount=500.0).id
+    db.session.expire_all()
+
+    # Only the new status is known to the session; the old row comes from the table
+    claim = db.session.get(Claim, claim_id, options=[db.load_only(Claim.id, Claim.user_id)])
+    claim.status = "rejected"
+    db.session.commit()
+    assert rollups.verify() == []
+    assert rollups.dashboard_stats(CLAIMANT)["rejected"] == 1
+
+
+def test_rollback_leaves_rollups_untouched(app):
+    claim = add_claim(claim_amount=300.0)
+    claim.status = "approved"
+    db.session.flush()
+    db.session.rollback()
+
+    assert rollups.verify() == []
+    assert rollups.dashboard_stats(CLAIMANT)["pending"] == 1
+
+
+def test_rebuild_repairs_drift(app):
+    for amount in (10.0, 20.0, 30.0):
+        add_claim(claim_amount=amount)
+    db.session.query(ClaimRollup).update({"claim_count": 99}, synchronize_session=False)
+    db.session.commit()
+    assert rollups.verify() != []
+
+    rollups.rebuild()
+    assert rollups.verify() == []
+    assert rollups.dashboard_stats(CLAIMANT)["total_amount"] == 60.0
+
+
+def test_analytics_spans_all_users(app):
+    add_claim(claim_amount=100.0)
+    add_claim(user_id=OTHER, claim_amount=50.0, insurance_type="life")
+
+    result = rollups.analytics(days=7)
+    assert result["by_status"] == {"pending": {"count": 2, "amount": 150.0}}
+    assert result["by_insurance_type"]["life"] == {"count": 1, "amount": 50.0}
+    assert sum(day["count"] for day in result["daily"]) == 2
+
+
+def test_analytics_read_one_row_per_type_status_day(app):
+    for user_id in range(1, 21):
+        add_claim(user_id=user_id, claim_amount=10.0)
+
+    assert ClaimRollup.query.count() == 20
+    assert ClaimGlobalRollup.query.count() == 1
+    assert rollups.status_totals() == {"pending": (20, 200.0)}
+
+
+def test_create_all_backfills_new_rollup_tables(app):
+    add_claim(claim_amount=100.0)
+    add_claim(claim_amount=40.0, status="approved")
+    db.session.remove()
+
+    # An existing database from before the rollups: the tables are created empty
+    ClaimRollup.__table__.drop(db.engine)
+    ClaimGlobalRollup.__table__.drop(db.engine)
+    db.create_all()
+
+    assert rollups.verify() == []
+    assert rollups.dashboard_stats(CLAIMANT)["total_amount"] == 140.0
+
+    # Tables that already exist are left alone
+    db.create_all()
+    assert rollups.verify() == []